@@ -0,0 +1,242 @@
+"""
+Benchmarks for the lookup and execution paths of the Coding Master server.
+
+Drives get_code_path, get_all_code_paths, execute_code and the MCP tools in-process against a
+generated workspace, prints latency percentiles and throughput as JSON, and optionally compares
+them with a saved baseline.
+
+    python benchmark.py --files 10000 --output bench.json
+    python benchmark.py --files 10000 --save-baseline baseline.json
+    python benchmark.py --files 10000 --baseline baseline.json   # exits 1 on regression
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import contextlib
+import tempfile
+import subprocess
+from typing import Callable, Dict, List
+
+import utils
+from build_cache import BuildCache
+from code_catalog import get_catalog
+
+# Filler files spread over subdirectories so lookups see a realistic tree.
+FILLER_EXTENSIONS = [".py", ".c", ".cpp", ".java", ".cs", ".txt", ".md", ".json"]
+FILES_PER_DIR = 200
+
+PROGRAMS = {
+    "python": ("bench_python.py", 'print("hello from python")\n'),
+    "c": ("bench_c.c", '#include <stdio.h>\nint main(void) { printf("hello from c\\n"); return 0; }\n'),
+    "cpp": ("bench_cpp.cpp", '#include <iostream>\nint main() { std::cout << "hello from cpp" << std::endl; return 0; }\n'),
+    "java": ("bench_java.java", 'public class bench_java { public static void main(String[] a) { System.out.println("hello from java"); } }\n'),
+}
+TOOLCHAINS = {"python": ["python3"], "c": ["gcc"], "cpp": ["g++"], "java": ["javac", "java"], "csharp": ["dotnet"]}
+
+
+def _dotnet_target_framework() -> str | None:
+    try:
+        version = subprocess.run(["dotnet", "--version"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"net{version.split('.')[0]}.0"
+
+
+def generate_workspace(root: str, file_count: int, languages: List[str]) -> Dict[str, str]:
+    """
+    Create file_count filler files plus one small program per available language under root.
+
+    Returns:
+        Language -> code name of its generated program.
+    """
+    for index in range(file_count):
+        directory = root if index < FILES_PER_DIR else os.path.join(root, f"pkg{index // FILES_PER_DIR:04d}")
+        os.makedirs(directory, exist_ok=True)
+        extension = FILLER_EXTENSIONS[index % len(FILLER_EXTENSIONS)]
+        with open(os.path.join(directory, f"file{index:06d}{extension}"), "w") as f:
+            f.write(f"# filler {index}\n")
+
+    programs = {}
+    for language in languages:
+        if language == "csharp":
+            target_framework = _dotnet_target_framework()
+            if target_framework is None:
+                continue
+            with open(os.path.join(root, "BenchHello.cs"), "w") as f:
+                f.write('System.Console.WriteLine("hello from csharp");\n')
+            with open(os.path.join(root, "BenchHello.csproj"), "w") as f:
+                f.write(
+                    '<Project Sdk="Microsoft.NET.Sdk"><PropertyGroup><OutputType>Exe</OutputType>'
+                    f"<TargetFramework>{target_framework}</TargetFramework>"
+                    "<EnableDefaultCompileItems>false</EnableDefaultCompileItems></PropertyGroup>"
+                    '<ItemGroup><Compile Include="BenchHello.cs" /></ItemGroup></Project>\n'
+                )
+            programs[language] = "BenchHello"
+        else:
+            file_name, source = PROGRAMS[language]
+            with open(os.path.join(root, file_name), "w") as f:
+                f.write(source)
+            programs[language] = os.path.splitext(file_name)[0]
+    return programs
+
+
+def summarize(latencies: List[float], wall: float) -> dict:
+    ordered = sorted(latencies)
+
+    def pct(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 4)
+
+    return {
+        "ops": len(ordered),
+        "throughput_per_s": round(len(ordered) / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+
+
+def bench_sync(fn: Callable[[], object], iterations: int) -> dict:
+    latencies = []
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, time.perf_counter() - wall_start)
+
+
+async def bench_async(fn: Callable[[], object], iterations: int) -> dict:
+    latencies = []
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, time.perf_counter() - wall_start)
+
+
+async def run_benchmarks(workspace: str, programs: Dict[str, str], iterations: int, exec_iterations: int, tools: bool) -> dict:
+    results = {}
+    start = time.perf_counter()
+    catalog = get_catalog(workspace)
+    catalog.refresh(force=True)
+    names = [entry["name"] for entry in catalog.entries()]
+    results["catalog_initial_scan"] = {"ms": round((time.perf_counter() - start) * 1000, 3), "files": len(names)}
+    rng = random.Random(0)
+
+    results["get_code_path"] = bench_sync(lambda: utils.get_code_path(workspace, rng.choice(names)), iterations)
+    results["get_all_code_paths"] = bench_sync(lambda: utils.get_all_code_paths(workspace), max(1, iterations // 100))
+
+    for language, code_name in programs.items():
+        code_path = utils.get_code_path(workspace, code_name)
+        utils.build_cache.clear()
+        start = time.perf_counter()
+        cold = await utils.execute_code_async(code_path)
+        results[f"execute_code.{language}.cold"] = {"ms": round((time.perf_counter() - start) * 1000, 3), "return_code": cold["return_code"]}
+        results[f"execute_code.{language}.warm"] = await bench_async(lambda: utils.execute_code_async(code_path), exec_iterations)
+
+    if tools:
+        try:
+            from fastmcp import Client
+            import server
+        except ImportError as e:
+            results["mcp_tools"] = {"skipped": f"fastmcp not available: {e}"}
+            return results
+        server.CODE_STORAGE = workspace
+        async with Client(server.mcp) as client:
+            results["tool.list_codes"] = await bench_async(
+                lambda: client.call_tool("list_codes", {"directory": workspace}), max(1, iterations // 100))
+            for language, code_name in programs.items():
+                results[f"tool.run_code.{language}"] = await bench_async(
+                    lambda: client.call_tool("run_code", {"code_name": code_name}), exec_iterations)
+            if programs:
+                batch = list(programs.values())
+                results["tool.run_codes"] = await bench_async(
+                    lambda: client.call_tool("run_codes", {"code_names": batch}), max(1, exec_iterations // 2))
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    List the benchmarks whose p50 latency grew or throughput dropped by more than tolerance.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not isinstance(previous, dict) or "p50_ms" not in current or "p50_ms" not in previous:
+            continue
+        if previous["p50_ms"] and current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {previous['p50_ms']}ms -> {current['p50_ms']}ms")
+        if previous["throughput_per_s"] and current["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_per_s']}/s -> {current['throughput_per_s']}/s")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000, help="Filler files in the generated workspace (e.g. 1000-100000).")
+    parser.add_argument("--iterations", type=int, default=2000, help="Iterations for lookup benchmarks.")
+    parser.add_argument("--exec-iterations", type=int, default=20, help="Iterations for execution benchmarks.")
+    parser.add_argument("--languages", default="python,c,cpp,java,csharp", help="Comma-separated languages to execute.")
+    parser.add_argument("--no-tools", action="store_true", help="Skip the in-process MCP tool benchmarks.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--baseline", help="Compare against this saved report; exit 1 on regression.")
+    parser.add_argument("--save-baseline", help="Save the report as a baseline to this path.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2 = 20%%).")
+    args = parser.parse_args()
+
+    languages = []
+    skipped = {}
+    for language in args.languages.split(","):
+        missing = [tool for tool in TOOLCHAINS[language] if shutil.which(tool) is None]
+        if missing:
+            skipped[language] = f"missing {', '.join(missing)}"
+        else:
+            languages.append(language)
+
+    workspace = tempfile.mkdtemp(prefix="coding-master-bench-")
+    cache_dir = tempfile.mkdtemp(prefix="coding-master-bench-cache-")
+    utils.build_cache = BuildCache(cache_dir)
+    try:
+        programs = generate_workspace(workspace, args.files, languages)
+        # The server logs with print(); keep stdout for the report.
+        with contextlib.redirect_stdout(sys.stderr):
+            results = asyncio.run(run_benchmarks(workspace, programs, args.iterations, args.exec_iterations, not args.no_tools))
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    report = {
+        "config": {"files": args.files, "iterations": args.iterations, "exec_iterations": args.exec_iterations,
+                   "python": sys.version.split()[0], "cpus": os.cpu_count()},
+        "skipped_languages": skipped,
+        "results": results,
+    }
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+    else:
+        print(rendered)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(rendered)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark of the demo add-numbers server: one add_numbers call per pair versus
+add_numbers_batch calls carrying many pairs each.
+
+Spawns demo_add_server_created_by_mcp.py over stdio with a local MCP client session, so every
+call pays the real JSON-RPC round trip, and prints latency percentiles and pair throughput as JSON.
+
+    python benchmark_demo_add.py --pairs 2000 --batch-size 500
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import List, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from benchmark import summarize
+
+DEMO_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_add_server_created_by_mcp.py")
+
+
+async def bench_per_call(session: ClientSession, pairs: List[Tuple[float, float]]) -> dict:
+    latencies = []
+    wall_start = time.perf_counter()
+    for a, b in pairs:
+        start = time.perf_counter()
+        await session.call_tool("add_numbers", {"a": a, "b": b})
+        latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    return {**summarize(latencies, wall), "pairs_per_s": round(len(pairs) / wall, 2)}
+
+
+async def bench_batched(session: ClientSession, pairs: List[Tuple[float, float]], batch_size: int, response_format: str) -> dict:
+    latencies = []
+    wall_start = time.perf_counter()
+    for index in range(0, len(pairs), batch_size):
+        batch = pairs[index:index + batch_size]
+        arguments = {"a": [a for a, _ in batch], "b": [b for _, b in batch], "format": response_format}
+        start = time.perf_counter()
+        result = await session.call_tool("add_numbers_batch", arguments)
+        latencies.append(time.perf_counter() - start)
+        if result.isError:
+            raise RuntimeError(result.content[0].text)
+    wall = time.perf_counter() - wall_start
+    return {**summarize(latencies, wall), "pairs_per_s": round(len(pairs) / wall, 2)}
+
+
+async def run_benchmarks(pair_count: int, batch_size: int, warmup: int) -> dict:
+    rng = random.Random(0)
+    pairs = [(rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)) for _ in range(pair_count)]
+    server = StdioServerParameters(command=sys.executable, args=[DEMO_SERVER])
+    async with stdio_client(server) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            for _ in range(warmup):
+                await session.call_tool("add_numbers", {"a": 1, "b": 2})
+                await session.call_tool("add_numbers_batch", {"a": [1, 2], "b": [3, 4]})
+
+            results = {
+                "per_call": await bench_per_call(session, pairs),
+                "batched_text": await bench_batched(session, pairs, batch_size, "text"),
+                "batched_compact": await bench_batched(session, pairs, batch_size, "compact"),
+            }
+    per_call = results["per_call"]["pairs_per_s"]
+    for name in ("batched_text", "batched_compact"):
+        results[name]["speedup_vs_per_call"] = round(results[name]["pairs_per_s"] / per_call, 2) if per_call else None
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=2000, help="Number of (a, b) pairs to add in each mode.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Pairs per add_numbers_batch call.")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed calls of each tool before measuring.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmarks(args.pairs, args.batch_size, args.warmup))
+    report = {
+        "config": {"pairs": args.pairs, "batch_size": args.batch_size, "python": sys.version.split()[0]},
+        "results": results,
+    }
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+    else:
+        print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import os
+import mmap
+import hashlib
+import tempfile
+
+# Fields of a run_code result larger than this many bytes are spilled to the blob store
+# when spilling is on (CODING_MASTER_SPILL_LARGE_FIELDS=1, or spill=True per call).
+DEFAULT_SPILL_BYTES = int(os.environ.get("CODING_MASTER_SPILL_BYTES", 64 * 1024))
+SPILL_BY_DEFAULT = os.environ.get("CODING_MASTER_SPILL_LARGE_FIELDS", "0") == "1"
+DEFAULT_MAX_BYTES = int(os.environ.get("CODING_MASTER_BLOB_STORE_MAX_BYTES", 256 * 1024 * 1024))
+PREVIEW_CHARS = 1024
+DEFAULT_PAGE_BYTES = 64 * 1024
+
+SPILLABLE_FIELDS = ["code", "output", "code_to_display_content"]
+
+
+class BlobStore:
+    """
+    Content-addressed store of large strings, one file per sha256 digest under root.
+
+    Blobs are written once (atomically) and read back in byte ranges through mmap, so paging
+    through a large output never loads the whole file. The least recently written blobs
+    are removed once the store grows past max_bytes.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def path(self, digest: str) -> str:
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob digest: '{digest}'")
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put(self, data: bytes) -> str:
+        """
+        Store data and return its digest. Storing the same content twice is a no-op.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.path(digest)
+        if os.path.exists(target):
+            os.utime(target)
+            return digest
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, staging = tempfile.mkstemp(prefix=".staging-", dir=os.path.dirname(target))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(staging, target)
+        except BaseException:
+            if os.path.exists(staging):
+                os.remove(staging)
+            raise
+        self.evict()
+        return digest
+
+    def size(self, digest: str) -> int:
+        try:
+            return os.path.getsize(self.path(digest))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No blob with digest '{digest}'") from None
+
+    def read(self, digest: str, offset: int = 0, length: int = DEFAULT_PAGE_BYTES) -> bytes:
+        """
+        Read up to length bytes starting at offset.
+
+        Args:
+            digest: The blob's sha256 digest.
+            offset: Byte offset to start at.
+            length: Maximum number of bytes to return.
+
+        Returns:
+            The bytes in [offset, offset + length), shorter at the end of the blob.
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must not be negative")
+        try:
+            f = open(self.path(digest), "rb")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No blob with digest '{digest}'") from None
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""  # empty files can't be mapped
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                return view[offset:offset + length]
+
+    def handle(self, text: str) -> dict:
+        """
+        Store text and describe it for a client: resource URI, size in bytes and a preview.
+        """
+        data = text.encode()
+        digest = self.put(data)
+        return {
+            "uri": f"blob://{digest}",
+            "size": len(data),
+            "preview": text[:PREVIEW_CHARS],
+        }
+
+    def evict(self) -> None:
+        """
+        Remove the least recently stored or reused blobs until the store fits in max_bytes.
+        """
+        blobs = []
+        for dir_path, _, files in os.walk(self.root):
+            for name in files:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in blobs)
+        for _, size, path in sorted(blobs):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def spill_large_fields(result: dict, store: BlobStore, threshold: int = DEFAULT_SPILL_BYTES) -> dict:
+    """
+    Move the large text fields of a run_code result into the blob store.
+
+    Each spilled field keeps only its preview, and result["blobs"][field] holds the blob's
+    uri, size and preview. Smaller fields are left inline.
+
+    Args:
+        result: A run_code result dictionary; changed in place.
+        store: Blob store to write to.
+        threshold: Fields whose UTF-8 size exceeds this many bytes are spilled.
+
+    Returns:
+        The same dictionary.
+    """
+    for field in SPILLABLE_FIELDS:
+        value = result.get(field)
+        # A character is at most 4 bytes in UTF-8, so short strings are skipped without encoding.
+        if not isinstance(value, str) or len(value) * 4 <= threshold or len(value.encode()) <= threshold:
+            continue
+        blob = store.handle(value)
+        result.setdefault("blobs", {})[field] = blob
+        result[field] = blob["preview"] + f"\n... [{blob['size']} bytes; read the rest from {blob['uri']}]"
+    return result
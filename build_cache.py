@@ -0,0 +1,164 @@
+import os
+import asyncio
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from typing import Awaitable, Callable, List, Tuple
+
+# Build artifacts live outside the source tree so compiled binaries and .class
+# files never end up next to the user's code.
+DEFAULT_CACHE_DIR = os.environ.get(
+    "CODING_MASTER_BUILD_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "yourmcpcodingmaster", "builds"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("CODING_MASTER_BUILD_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class BuildCache:
+    """
+    Content-addressed cache of build outputs (binaries, .class files).
+
+    Entries are keyed on a hash of the source contents, the compiler and its flags,
+    and are evicted least-recently-used first once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._building: dict = {}  # key -> [asyncio.Lock held while that key compiles, tasks using it]
+
+    def make_key(self, source: bytes, source_name: str, compiler: str, flags: List[str]) -> str:
+        """
+        Compute the cache key for a build.
+
+        Args:
+            source: Raw contents of the source file.
+            source_name: Base name of the source file (Java class names depend on it).
+            compiler: Compiler executable (e.g., "gcc", "javac").
+            flags: Compiler flags that affect the produced artifacts.
+
+        Returns:
+            A hex digest identifying the build.
+        """
+        digest = hashlib.sha256()
+        compiler_path = shutil.which(compiler) or compiler
+        for part in [compiler, compiler_path, source_name, *flags]:
+            digest.update(part.encode())
+            digest.update(b"\0")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def lookup(self, key: str) -> str | None:
+        """
+        Return the artifact directory for key, or None on a miss.
+        A hit refreshes the entry's position in the LRU order.
+        """
+        entry = self.entry_path(key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return entry
+
+    async def build(
+        self,
+        key: str,
+        compile_fn: Callable[[str], Awaitable[subprocess.CompletedProcess]],
+    ) -> Tuple[str | None, str, subprocess.CompletedProcess | None]:
+        """
+        Return cached artifacts for key, compiling them on a miss.
+
+        Args:
+            key: Cache key from make_key.
+            compile_fn: Coroutine function called with an empty output directory; must
+                place the build artifacts there and return the compiler's CompletedProcess.
+
+        Returns:
+            (artifact_dir, "hit" | "miss", compile_result). artifact_dir is None and
+            compile_result holds the compiler output when compilation failed.
+        """
+        entry = self.lookup(key)
+        if entry is not None:
+            return entry, "hit", None
+
+        # Concurrent requests for the same key wait for one compile instead of repeating it.
+        building = self._building.setdefault(key, [asyncio.Lock(), 0])
+        building[1] += 1
+        try:
+            async with building[0]:
+                entry = self.lookup(key)
+                if entry is not None:
+                    return entry, "hit", None
+                return await self._compile(key, compile_fn)
+        finally:
+            # Dropped only when no task holds or waits for the lock; a waiter must keep
+            # sharing it rather than find a fresh lock and compile alongside the next caller.
+            building[1] -= 1
+            if building[1] == 0 and self._building.get(key) is building:
+                del self._building[key]
+
+    async def _compile(self, key: str, compile_fn: Callable[[str], Awaitable[subprocess.CompletedProcess]]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=self.cache_dir)
+        try:
+            compile_result = await compile_fn(staging_dir)
+            if compile_result.returncode != 0:
+                return None, "miss", compile_result
+            entry = self.entry_path(key)
+            try:
+                os.rename(staging_dir, entry)
+            except OSError:
+                # Another build of the same key finished first; keep theirs.
+                if not os.path.isdir(entry):
+                    raise
+        finally:
+            if os.path.isdir(staging_dir):
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+        self.evict()
+        return entry, "miss", compile_result
+
+    def evict(self) -> None:
+        """
+        Remove least-recently-used entries until the cache fits in max_bytes.
+        """
+        try:
+            names = [name for name in os.listdir(self.cache_dir) if not name.startswith(".")]
+        except FileNotFoundError:
+            return
+
+        entries = []
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.path.getmtime(path), _dir_size(path), path))
+            except OSError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            print(f"Evicting cached build: {path}")
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
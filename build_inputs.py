@@ -0,0 +1,86 @@
+import os
+import re
+import hashlib
+from typing import List
+
+from source_loader import source_cache
+
+# Quoted includes are searched for next to the including file, which is all a single-file
+# build sees; <system> headers belong to the toolchain and are covered by its path in the key.
+QUOTED_INCLUDE = re.compile(r'^[ \t]*#[ \t]*include[ \t]*"([^"]+)"', re.MULTILINE)
+
+
+def native_include_inputs(code_path: str) -> List[str]:
+    """
+    Get the local headers a C/C++ source file includes, directly or through other local headers.
+    Includes inside inactive #if blocks are listed too, which only makes the set larger.
+
+    Args:
+        code_path: Full path to the source file.
+
+    Returns:
+        A sorted list of full paths, including headers that are included but don't exist (yet).
+    """
+    found = set()
+    pending = [os.path.abspath(code_path)]
+    while pending:
+        including_path = pending.pop()
+        try:
+            text = source_cache.load_sync(including_path).text
+        except (OSError, UnicodeDecodeError):
+            continue
+        for include in QUOTED_INCLUDE.findall(text):
+            header = os.path.normpath(os.path.join(os.path.dirname(including_path), include))
+            if header not in found:
+                found.add(header)
+                pending.append(header)
+    return sorted(found)
+
+
+def sibling_inputs(code_path: str, extension: str) -> List[str]:
+    """
+    Get the other files with the given extension in the directory of code_path: javac, run in
+    that directory, compiles the sibling .java files of the classes a source references.
+
+    Returns:
+        A sorted list of full paths, not including code_path itself.
+    """
+    code_path = os.path.abspath(code_path)
+    directory = os.path.dirname(code_path)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in names
+        if name.endswith(extension) and not name.startswith(".") and os.path.join(directory, name) != code_path
+    )
+
+
+def build_inputs(code_path: str) -> List[str]:
+    """
+    Get the files besides a single-file target that its build reads: local headers of C/C++
+    sources and sibling .java classes.
+    """
+    extension = os.path.splitext(code_path)[1]
+    if extension in (".c", ".cpp", ".cc", ".c++"):
+        return native_include_inputs(code_path)
+    if extension == ".java":
+        return sibling_inputs(code_path, extension)
+    return []
+
+
+def digest_inputs(base_dir: str, content: bytes, input_paths: List[str]) -> bytes:
+    """
+    Digest the content of a target together with the path (relative to base_dir) and content
+    of each of its inputs. Missing inputs are recorded as missing, so creating one changes the digest.
+    Reads through the source cache; call it through source_loader.run_io from the event loop.
+    """
+    digest = hashlib.sha256(content)
+    for input_path in input_paths:
+        digest.update(os.path.relpath(input_path, base_dir).encode() + b"\0")
+        try:
+            digest.update(source_cache.load_sync(input_path).digest.encode())
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.digest()
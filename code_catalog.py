@@ -0,0 +1,164 @@
+import os
+import time
+import threading
+from typing import Dict, List
+
+# Language label for each executable extension; used for lookups and per-language concurrency caps.
+LANGUAGE_BY_EXTENSION = {
+    ".py": "python",
+    ".java": "java",
+    ".csproj": "csharp",
+    ".cs": "csharp",
+    ".c": "c",
+    ".cpp": "cpp",
+    ".c++": "cpp",
+    ".cc": "cpp",
+    ".cbuild": "native",
+}
+
+# When several files share a name, the earliest extension here wins. .csproj beats its .cs
+# source (which can't be run directly) and a .cbuild manifest beats a C/C++ unit of the same
+# name; files with other extensions come last, alphabetically.
+EXTENSION_PREFERENCE = [".csproj", ".cbuild", ".py", ".java", ".c", ".cpp", ".cc", ".c++", ".cs"]
+
+# Build output and tooling directories are never indexed.
+IGNORED_DIRS = {"bin", "obj", "__pycache__", "node_modules"}
+
+# Minimum seconds between freshness checks of the directory tree.
+REFRESH_INTERVAL = float(os.environ.get("CODING_MASTER_CATALOG_REFRESH_INTERVAL", 1.0))
+
+
+def _preference(entry: dict) -> tuple:
+    extension = entry["extension"]
+    rank = EXTENSION_PREFERENCE.index(extension) if extension in EXTENSION_PREFERENCE else len(EXTENSION_PREFERENCE)
+    return (entry["depth"], rank, extension, entry["path"])
+
+
+class CodeCatalog:
+    """
+    In-memory index of the code files under a storage directory.
+
+    Directories are listed once with os.scandir and only rescanned when their mtime changes,
+    so lookups don't hit the filesystem for every request.
+    Each entry is a dict with path, relpath, name, extension, size, mtime, language and depth.
+    """
+
+    def __init__(self, root: str, recursive: bool = True, refresh_interval: float = REFRESH_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.recursive = recursive
+        self.refresh_interval = refresh_interval
+        self._dirs: Dict[str, tuple] = {}  # dir path -> (mtime_ns, file entries, subdir paths)
+        self._by_name: Dict[str, List[dict]] = {}
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _scan_dir(self, dir_path: str, depth: int) -> tuple:
+        files, subdirs = [], []
+        with os.scandir(dir_path) as it:
+            for item in it:
+                # Symlinked directories aren't followed: a link to an ancestor would never end.
+                if item.is_dir(follow_symlinks=False):
+                    if self.recursive and not item.name.startswith(".") and item.name not in IGNORED_DIRS:
+                        subdirs.append(item.path)
+                elif item.is_file():
+                    try:
+                        stat = item.stat()
+                    except OSError:
+                        continue
+                    name, extension = os.path.splitext(item.name)
+                    files.append({
+                        "path": item.path,
+                        "relpath": os.path.relpath(item.path, self.root),
+                        "name": name,
+                        "extension": extension,
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime,
+                        "language": LANGUAGE_BY_EXTENSION.get(extension),
+                        "depth": depth,
+                    })
+        return files, subdirs
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Bring the index up to date, rescanning only directories whose mtime changed.
+
+        Args:
+            force: Check the tree even if the refresh interval hasn't elapsed.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._dirs and now - self._last_check < self.refresh_interval:
+                return
+            self._last_check = now
+
+            changed = False
+            seen = {}
+            pending = [(self.root, 0)]
+            while pending:
+                dir_path, depth = pending.pop()
+                try:
+                    mtime_ns = os.stat(dir_path).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                cached = self._dirs.get(dir_path)
+                if cached is None or cached[0] != mtime_ns:
+                    try:
+                        files, subdirs = self._scan_dir(dir_path, depth)
+                    except OSError as e:
+                        # Unreadable directories are left out rather than failing every lookup.
+                        print(f"Skipping directory {dir_path}: {e}")
+                        continue
+                    cached = (mtime_ns, files, subdirs)
+                    changed = True
+                seen[dir_path] = cached
+                pending.extend((subdir, depth + 1) for subdir in cached[2])
+
+            if changed or len(seen) != len(self._dirs):
+                self._dirs = seen
+                self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        by_name: Dict[str, List[dict]] = {}
+        for _, files, _ in self._dirs.values():
+            for entry in files:
+                by_name.setdefault(entry["name"], []).append(entry)
+                relname = os.path.splitext(entry["relpath"])[0]
+                if relname != entry["name"]:
+                    by_name.setdefault(relname, []).append(entry)
+        for entries in by_name.values():
+            entries.sort(key=_preference)
+        self._by_name = by_name
+
+    def candidates(self, code_name: str) -> List[dict]:
+        """
+        Get the entries matching a code name, most preferred first.
+
+        Args:
+            code_name: File name without extension, optionally prefixed with a subdirectory
+                relative to the root (e.g. "tools/report").
+
+        Returns:
+            A list of catalog entries, empty when nothing matches.
+        """
+        self.refresh()
+        return list(self._by_name.get(os.path.normpath(code_name), []))
+
+    def entries(self) -> List[dict]:
+        """
+        Get every indexed file, ordered by relative path.
+        """
+        self.refresh()
+        return sorted((entry for _, files, _ in self._dirs.values() for entry in files), key=lambda e: e["relpath"])
+
+
+_catalogs: Dict[str, CodeCatalog] = {}
+
+
+def get_catalog(root: str) -> CodeCatalog:
+    """
+    Get the shared catalog for a storage directory, creating it on first use.
+    """
+    root = os.path.abspath(root)
+    if root not in _catalogs:
+        _catalogs[root] = CodeCatalog(root)
+    return _catalogs[root]
@@ -2,6 +2,7 @@
 
 import asyncio
 import json
+import operator
 from typing import Any, Sequence
 from mcp.server.models import InitializationOptions
 import mcp.types as types
@@ -11,6 +12,58 @@ import mcp.server.stdio
 
 server = Server("add-numbers-server")
 
+# Batches with more pairs than this get the compact JSON response unless a format is requested.
+COMPACT_THRESHOLD = 100
+NUMBER_TYPES = (int, float)
+
+# Built once at import; list_tools returns the same objects every time.
+TOOLS = [
+    types.Tool(
+        name="add_numbers",
+        description="Add two numbers together",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "a": {
+                    "type": "number",
+                    "description": "First number to add"
+                },
+                "b": {
+                    "type": "number", 
+                    "description": "Second number to add"
+                }
+            },
+            "required": ["a", "b"]
+        }
+    ),
+    types.Tool(
+        name="add_numbers_batch",
+        description="Add two equally long arrays of numbers element-wise in one call",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "a": {
+                    "type": "array",
+                    "items": {"type": "number"},
+                    "description": "First numbers to add"
+                },
+                "b": {
+                    "type": "array",
+                    "items": {"type": "number"},
+                    "description": "Second numbers to add, same length as a"
+                },
+                "format": {
+                    "type": "string",
+                    "enum": ["text", "compact"],
+                    "description": f"'text': one sentence per pair; 'compact': a JSON array of the sums. "
+                                   f"Defaults to compact for more than {COMPACT_THRESHOLD} pairs."
+                }
+            },
+            "required": ["a", "b"]
+        }
+    ),
+]
+
 
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
@@ -18,26 +71,35 @@ async def handle_list_tools() -> list[types.Tool]:
     List available tools.
     Each tool specifies its arguments using JSON Schema validation.
     """
-    return [
-        types.Tool(
-            name="add_numbers",
-            description="Add two numbers together",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "a": {
-                        "type": "number",
-                        "description": "First number to add"
-                    },
-                    "b": {
-                        "type": "number", 
-                        "description": "Second number to add"
-                    }
-                },
-                "required": ["a", "b"]
-            }
-        )
-    ]
+    return TOOLS
+
+
+def add_batch(a: Sequence[float], b: Sequence[float]) -> list[float]:
+    """
+    Add a and b element-wise in a single pass (the loop runs in C via map).
+    """
+    if len(a) != len(b):
+        raise ValueError(f"'a' and 'b' must have the same length (got {len(a)} and {len(b)})")
+    # Exact type checks: strings or lists would otherwise be concatenated, and bools added as 0/1.
+    if not all(type(value) in NUMBER_TYPES for value in a) or not all(type(value) in NUMBER_TYPES for value in b):
+        raise ValueError("'a' and 'b' must contain only numbers")
+    return list(map(operator.add, a, b))
+
+
+def handle_add_numbers_batch(arguments: dict[str, Any]) -> list[types.TextContent]:
+    a = arguments.get("a")
+    b = arguments.get("b")
+    if not isinstance(a, list) or not isinstance(b, list):
+        raise ValueError("Both 'a' and 'b' must be arrays of numbers")
+    
+    sums = add_batch(a, b)
+    
+    response_format = arguments.get("format") or ("compact" if len(sums) > COMPACT_THRESHOLD else "text")
+    if response_format == "compact":
+        text = json.dumps(sums, separators=(",", ":"))
+    else:
+        text = "\n".join(f"The sum of {x} and {y} is {total}" for x, y, total in zip(a, b, sums))
+    return [types.TextContent(type="text", text=text)]
 
 
 @server.call_tool()
@@ -48,12 +110,15 @@ async def handle_call_tool(
     Handle tool execution requests.
     Tools can modify server state and notify clients of changes.
     """
-    if name != "add_numbers":
+    if name not in ("add_numbers", "add_numbers_batch"):
         raise ValueError(f"Unknown tool: {name}")
     
     if not arguments:
         raise ValueError("Missing arguments")
     
+    if name == "add_numbers_batch":
+        return handle_add_numbers_batch(arguments)
+    
     # Extract the two numbers
     a = arguments.get("a")
     b = arguments.get("b")
@@ -0,0 +1,196 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from metrics import metrics
+from native_project import DEFAULT_PROFILE
+from sandbox import ExecutionLimits
+from single_flight import ResultCache, SingleFlight, cache_ttl_from_source, execution_key
+from source_loader import SourceFile, run_io, source_cache
+from streaming import OutputCallback
+from utils import DOTNET_WARM, LANGUAGE_BY_EXTENSION, execute_code_async
+
+# Per-language caps on top of the global worker limit. dotnet builds are memory hungry,
+# so C# gets a lower default. Override with e.g. CODING_MASTER_LANGUAGE_LIMITS="csharp=1,java=2".
+DEFAULT_LANGUAGE_LIMITS = {"csharp": 2}
+
+
+def _parse_language_limits(spec: str) -> Dict[str, int]:
+    limits = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        language, value = item.split("=", 1)
+        limits[language.strip()] = int(value)
+    return limits
+
+
+class ExecutionEngine:
+    """
+    Runs execute_code_async under a global worker limit and per-language caps,
+    and keeps queue-depth and wait-time statistics for sizing the pool.
+    Concurrent identical runs (same file contents, limits and settings) share one execution,
+    and programs that opt in have their results cached for a few seconds.
+    """
+
+    def __init__(self, max_workers: int | None = None, language_limits: Dict[str, int] | None = None):
+        self.max_workers = max_workers or int(os.environ.get("CODING_MASTER_MAX_WORKERS", os.cpu_count() or 1))
+        self.language_limits = dict(DEFAULT_LANGUAGE_LIMITS)
+        self.language_limits.update(_parse_language_limits(os.environ.get("CODING_MASTER_LANGUAGE_LIMITS", "")))
+        if language_limits:
+            self.language_limits.update(language_limits)
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._workers: asyncio.Semaphore | None = None
+        self._language_slots: Dict[str, asyncio.Semaphore] = {}
+
+        self.queued = 0
+        self.queued_by_language: Dict[str, int] = {}
+        self.in_flight = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        self.single_flight = SingleFlight()
+        self.result_cache = ResultCache()
+
+    def _bind_loop(self) -> None:
+        # Semaphores belong to one event loop; rebuild them if we are driven from a new one
+        # (e.g. successive asyncio.run calls in scripts and benchmarks).
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._workers = asyncio.Semaphore(self.max_workers)
+            self._language_slots = {}
+
+    def _language_slot(self, language: str) -> asyncio.Semaphore:
+        if language not in self._language_slots:
+            limit = min(self.language_limits.get(language, self.max_workers), self.max_workers)
+            self._language_slots[language] = asyncio.Semaphore(limit)
+        return self._language_slots[language]
+
+    @asynccontextmanager
+    async def slot(self, language: str):
+        """
+        Wait for a free worker for the given language.
+
+        Yields:
+            The time spent waiting in the queue, in seconds.
+        """
+        self._bind_loop()
+        language_slot = self._language_slot(language)
+        self.queued += 1
+        self.queued_by_language[language] = self.queued_by_language.get(language, 0) + 1
+        start = time.perf_counter()
+        try:
+            await language_slot.acquire()
+            try:
+                await self._workers.acquire()
+            except BaseException:
+                language_slot.release()
+                raise
+        finally:
+            self.queued -= 1
+            self.queued_by_language[language] -= 1
+
+        waited = time.perf_counter() - start
+        self.in_flight += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        try:
+            yield waited
+        finally:
+            self._workers.release()
+            language_slot.release()
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def _execute(self, code_path: str, on_output: OutputCallback | None, limits: ExecutionLimits | None, source: SourceFile | None = None, **options) -> dict:
+        language = LANGUAGE_BY_EXTENSION.get(os.path.splitext(code_path)[1], "other")
+        async with self.slot(language) as waited:
+            result = await execute_code_async(code_path, on_output=on_output, limits=limits, source=source, **options)
+        result["queue_wait_ms"] = round(waited * 1000, 3)
+        return result
+
+    async def run(
+        self,
+        code_path: str,
+        on_output: OutputCallback | None = None,
+        limits: ExecutionLimits | None = None,
+        cache_ttl: float | None = None,
+        profile: bool = False,
+        profile_top_n: int | None = None,
+    ) -> dict:
+        """
+        Execute a code file once a worker is available.
+
+        Args:
+            code_path: Full path to the code file to execute.
+            on_output: Optional coroutine receiving output chunks as they arrive. Streamed runs
+                always execute on their own.
+            limits: Optional resource limits; defaults to sandbox.DEFAULT_LIMITS.
+            cache_ttl: Reuse this run's result for identical requests for this many seconds.
+                Defaults to the program's `coding-master: cache-ttl=<seconds>` comment, if any.
+            profile: Profile the program (see execute_code_async).
+            profile_top_n: Functions per ranking in the profile summary.
+
+        Returns:
+            The execute_code result dictionary plus "queue_wait_ms". Results shared with a
+            concurrent identical request carry "shared_run": True, and results served from
+            the result cache carry "result_cache": "hit".
+        """
+        options = {"profile": profile}
+        if profile_top_n is not None:
+            options["profile_top_n"] = profile_top_n
+        try:
+            # Loaded once here and handed to execute_code, which then doesn't read it again,
+            # so the read phase is timed here.
+            with metrics.timer("execute_phase_seconds", phase="read"):
+                source = await source_cache.load(code_path)
+            code_content = source.text
+        except (OSError, ValueError):
+            # Let execute_code report the problem in its usual result format.
+            return await self._execute(code_path, on_output, limits, **options)
+        if on_output is not None:
+            return await self._execute(code_path, on_output, limits, source, **options)
+
+        settings = {"dotnet_warm": DOTNET_WARM, "native_profile": DEFAULT_PROFILE, **options}
+        key = await run_io(execution_key, code_path, source.digest, limits, settings)
+        if cache_ttl is None:
+            cache_ttl = cache_ttl_from_source(code_content)
+        if cache_ttl:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                cached["result_cache"] = "hit"
+                cached["queue_wait_ms"] = 0.0
+                return cached
+
+        result, shared = await self.single_flight.do(key, lambda: self._execute(code_path, None, limits, source, **options))
+        result = dict(result)
+        if shared:
+            result["shared_run"] = True
+        if cache_ttl and not result.get("timed_out") and not result.get("limit_exceeded"):
+            self.result_cache.put(key, result, cache_ttl)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the engine's queue and wait-time statistics.
+        """
+        return {
+            "max_workers": self.max_workers,
+            "language_limits": self.language_limits,
+            "queue_depth": self.queued,
+            "queue_depth_by_language": {lang: n for lang, n in self.queued_by_language.items() if n},
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.total_wait / self.completed * 1000, 3) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "single_flight": self.single_flight.stats(),
+            "result_cache": self.result_cache.stats(),
+        }
+
+
+engine = ExecutionEngine()
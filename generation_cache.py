@@ -0,0 +1,142 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("CODING_MASTER_GENERATION_CACHE_ENTRIES", 256))
+DEFAULT_TTL = float(os.environ.get("CODING_MASTER_GENERATION_CACHE_TTL", 7 * 24 * 3600))
+# Total size of cached responses kept on disk before the least recently used are dropped.
+DEFAULT_MAX_DISK_BYTES = int(os.environ.get("CODING_MASTER_GENERATION_CACHE_DISK_BYTES", 64 * 1024 * 1024))
+
+
+def normalize_description(tool_desc: str) -> str:
+    """
+    Normalize a tool description so trivially different requests share a cache entry
+    (case, whitespace and trailing punctuation are ignored).
+    """
+    return re.sub(r"\s+", " ", tool_desc.lower()).strip().rstrip(".!?;:, ")
+
+
+def make_key(tool_desc: str, docs_hash: str, model_preferences: str) -> str:
+    digest = hashlib.sha256()
+    for part in (normalize_description(tool_desc), docs_hash, model_preferences):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class GenerationCache:
+    """
+    Two-level cache of write_me_a_mcp_tool responses: an in-memory LRU in front of an
+    optional SQLite file. Entries expire after ttl seconds.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict = OrderedDict()  # key -> (created_at, response)
+        self._db: sqlite3.Connection | None = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection | None:
+        if self.db_path is None:
+            return None
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.db_path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS generations ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> str | None:
+        """
+        Get a cached response, or None if it is missing or expired.
+        """
+        now = time.time()
+        cached = self._memory.get(key)
+        if cached is not None:
+            if now - cached[0] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            del self._memory[key]
+
+        db = self._connection()
+        if db is not None:
+            row = db.execute("SELECT response, created_at FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] < self.ttl:
+                db.execute("UPDATE generations SET accessed_at = ? WHERE key = ?", (now, key))
+                db.commit()
+                self._remember(key, row[1], row[0])
+                self.hits += 1
+                self.disk_hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def _remember(self, key: str, created_at: float, response: str) -> None:
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        self._remember(key, now, response)
+        db = self._connection()
+        if db is None:
+            return
+        db.execute("INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?)", (key, response, now, now))
+        db.execute("DELETE FROM generations WHERE created_at < ?", (now - self.ttl,))
+        # Size-based eviction: drop least recently used rows until the total fits.
+        total = db.execute("SELECT COALESCE(SUM(LENGTH(response)), 0) FROM generations").fetchone()[0]
+        if total > self.max_disk_bytes:
+            for row_key, size in db.execute("SELECT key, LENGTH(response) FROM generations ORDER BY accessed_at").fetchall():
+                if total <= self.max_disk_bytes:
+                    break
+                db.execute("DELETE FROM generations WHERE key = ?", (row_key,))
+                total -= size
+        db.commit()
+
+    def invalidate(self, key: str | None = None) -> None:
+        """
+        Drop one entry, or every entry when key is None.
+        """
+        if key is None:
+            self._memory.clear()
+        else:
+            self._memory.pop(key, None)
+        db = self._connection()
+        if db is not None:
+            if key is None:
+                db.execute("DELETE FROM generations")
+            else:
+                db.execute("DELETE FROM generations WHERE key = ?", (key,))
+            db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_path": self.db_path,
+        }
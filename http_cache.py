@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import httpx
+
+# Within this many seconds of the last successful fetch or revalidation, the saved copy
+# is used without touching the network.
+DEFAULT_TTL = float(os.environ.get("CODING_MASTER_HTTP_CACHE_TTL", 3600))
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+# output_file -> monotonic time of the last fetch or 304. Kept in memory so a
+# revalidation that finds the document unchanged doesn't write anything to disk.
+_validated_at: dict = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared, connection-pooled HTTP client, creating it on first use.
+    The client lives as long as the server's event loop.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def aclose_http_client() -> None:
+    """
+    Close the shared client and its pooled connections; the server calls this on shutdown.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def metadata_path(output_file: str) -> str:
+    """
+    Path of the cache metadata (URL, ETag, Last-Modified, content hash) stored next to output_file.
+    """
+    return output_file + ".http-cache.json"
+
+
+def _load_metadata(output_file: str) -> dict:
+    try:
+        with open(metadata_path(output_file), "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+async def fetch_json_cached(url: str, output_file: str, ttl: float = DEFAULT_TTL) -> str:
+    """
+    Fetch a JSON document into output_file, reusing the saved copy whenever possible.
+
+    Within ttl of the last check the saved copy is used as is. After that the request is
+    conditional (If-None-Match / If-Modified-Since); a 304 or an identical body leaves the file
+    untouched. If the server can't be reached, an existing saved copy is used instead.
+
+    Args:
+        url: The URL to fetch the JSON document from.
+        output_file: Full path of the file to save the document to.
+        ttl: Seconds a fetched or revalidated copy is trusted without a request.
+
+    Returns:
+        "fresh" (within ttl), "not-modified", "updated", "unchanged" (200 with the same
+        body) or "offline" (request failed, saved copy used).
+
+    Raises:
+        httpx.HTTPError: If the request fails and there is no saved copy.
+        json.JSONDecodeError: If the response is not JSON.
+    """
+    metadata = _load_metadata(output_file)
+    has_copy = metadata.get("url") == url and os.path.exists(output_file)
+    if not has_copy:
+        metadata = {}
+
+    validated_at = _validated_at.get(output_file)
+    if has_copy and validated_at is not None and time.monotonic() - validated_at < ttl:
+        return "fresh"
+
+    headers = {}
+    if metadata.get("etag"):
+        headers["If-None-Match"] = metadata["etag"]
+    if metadata.get("last_modified"):
+        headers["If-Modified-Since"] = metadata["last_modified"]
+
+    try:
+        response = await get_http_client().get(url, headers=headers)
+        if response.status_code == 304 and has_copy:
+            _validated_at[output_file] = time.monotonic()
+            return "not-modified"
+        response.raise_for_status()  # Raise an error for HTTP issues
+    except httpx.RequestError:
+        if has_copy:
+            print(f"Could not reach {url}; using saved copy '{output_file}'.")
+            return "offline"
+        raise
+
+    data = response.json()
+    content = json.dumps(data, indent=4)
+    content_hash = hashlib.sha256(content.encode()).hexdigest()
+    status = "unchanged"
+    if not has_copy or metadata.get("sha256") != content_hash:
+        with open(output_file, "w") as file:
+            file.write(content)
+        status = "updated"
+
+    new_metadata = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": content_hash,
+    }
+    if new_metadata != metadata:
+        with open(metadata_path(output_file), "w") as f:
+            json.dump(new_metadata, f)
+    _validated_at[output_file] = time.monotonic()
+    return status
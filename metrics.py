@@ -0,0 +1,172 @@
+import time
+import inspect
+import functools
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+# Each histogram keeps this many of its most recent samples for percentiles.
+WINDOW = 2048
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: dict) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: tuple, extra: dict | None = None) -> str:
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class RollingHistogram:
+    """
+    Percentiles over a rolling window of samples, plus an all-time count and sum.
+    """
+
+    def __init__(self, window: int = WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "p50": round(self.percentile(0.50), 6),
+            "p95": round(self.percentile(0.95), 6),
+            "p99": round(self.percentile(0.99), 6),
+        }
+
+
+class Metrics:
+    """
+    In-process registry of counters, gauges and rolling histograms, keyed by name and labels.
+    """
+
+    def __init__(self):
+        self.counters: Dict[MetricKey, float] = {}
+        self.gauges: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, RollingHistogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge_add(self, name: str, delta: float, **labels) -> None:
+        key = _key(name, labels)
+        self.gauges[key] = self.gauges.get(key, 0) + delta
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        if key not in self.histograms:
+            self.histograms[key] = RollingHistogram()
+        self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Observe the duration (seconds) of the with-block in histogram name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        def render(key: MetricKey) -> str:
+            return key[0] + _format_labels(key[1])
+
+        return {
+            "counters": {render(key): value for key, value in sorted(self.counters.items())},
+            "gauges": {render(key): value for key, value in sorted(self.gauges.items())},
+            "histograms": {render(key): hist.summary() for key, hist in sorted(self.histograms.items())},
+        }
+
+    def prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format (histograms as summaries).
+        """
+        lines = []
+        for kind, values in (("counter", self.counters), ("gauge", self.gauges)):
+            typed = set()
+            for (name, labels), value in sorted(values.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} {kind}")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        typed = set()
+        for (name, labels), hist in sorted(self.histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} summary")
+                typed.add(name)
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f"{name}{_format_labels(labels, {'quantile': q})} {hist.percentile(q)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist.total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.gauges.clear()
+        self.histograms.clear()
+
+
+metrics = Metrics()
+
+
+def instrument_tool(fn):
+    """
+    Record calls, errors, in-flight count and duration of an MCP tool function.
+    Apply below @mcp.tool() so FastMCP registers the instrumented function.
+    """
+    tool = fn.__name__
+
+    def before():
+        metrics.inc("tool_calls_total", tool=tool)
+        metrics.gauge_add("tool_in_flight", 1, tool=tool)
+        return time.perf_counter()
+
+    def after(start: float, failed: bool):
+        metrics.gauge_add("tool_in_flight", -1, tool=tool)
+        metrics.observe("tool_duration_seconds", time.perf_counter() - start, tool=tool)
+        if failed:
+            metrics.inc("tool_errors_total", tool=tool)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            start, failed = before(), True
+            try:
+                result = await fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                after(start, failed)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start, failed = before(), True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            after(start, failed)
+    return wrapper
@@ -0,0 +1,244 @@
+import os
+import glob
+import json
+import time
+import asyncio
+import hashlib
+import subprocess
+from typing import Awaitable, Callable, Dict, List
+
+# Incremental build trees for multi-file C/C++ projects (objects, depfiles, linked binary).
+# Unlike the content-addressed build cache they are updated in place, one tree per project.
+DEFAULT_BUILD_DIR = os.environ.get(
+    "CODING_MASTER_NATIVE_BUILD_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "yourmcpcodingmaster", "projects"),
+)
+# Translation units compiled at the same time.
+DEFAULT_JOBS = int(os.environ.get("CODING_MASTER_NATIVE_JOBS", os.cpu_count() or 1))
+DEFAULT_PROFILE = os.environ.get("CODING_MASTER_NATIVE_PROFILE", "debug")
+
+PROFILE_FLAGS = {
+    "debug": ["-O0", "-g"],
+    "release": ["-O2"],
+}
+
+MANIFEST_EXTENSION = ".cbuild"
+C_EXTENSIONS = {".c"}
+CPP_EXTENSIONS = {".cpp", ".cc", ".c++"}
+DEFAULT_SOURCES = ["**/*.c", "**/*.cpp", "**/*.cc", "**/*.c++"]
+IGNORED_DIRS = {"bin", "obj", "build"}
+
+RunProcess = Callable[[List[str], str], Awaitable[subprocess.CompletedProcess]]
+
+
+def profile_flags(profile: str) -> List[str]:
+    if profile not in PROFILE_FLAGS:
+        raise ValueError(f"Unknown build profile '{profile}', expected one of: {', '.join(PROFILE_FLAGS)}")
+    return PROFILE_FLAGS[profile]
+
+
+def parse_depfile(path: str) -> List[str]:
+    """
+    Get the prerequisites listed in a make-style depfile written by `-MMD`.
+
+    Args:
+        path: Path to the .d file.
+
+    Returns:
+        The source and header paths the object depends on, or an empty list if the file is missing.
+    """
+    try:
+        with open(path, "r") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return []
+    content = content.replace("\\\n", " ")
+    _, _, prerequisites = content.partition(": ")
+    # Escaped spaces belong to the path; split on the others.
+    parts = prerequisites.replace("\\ ", "\0").split()
+    return [part.replace("\0", " ") for part in parts]
+
+
+class NativeProject:
+    """
+    A multi-file C/C++ project described by a JSON manifest (`<name>.cbuild`).
+
+    Manifest keys, all optional:
+        sources: glob patterns relative to the manifest directory (default: every C/C++ file below it).
+        output: name of the executable (default: the manifest's base name).
+        profile: "debug" or "release" (default: CODING_MASTER_NATIVE_PROFILE).
+        include_dirs, defines, cflags, ldflags: extra compiler and linker arguments.
+
+    Each translation unit is compiled to its own object with `-MMD`; a unit is recompiled only when
+    its object is missing, its compile command changed, or the source or a header in its depfile is
+    newer than the object. The executable is relinked only when an object changed.
+    """
+
+    def __init__(self, manifest_path: str, build_root: str = DEFAULT_BUILD_DIR, profile: str | None = None, extra_flags: List[str] | None = None):
+        self.manifest_path = os.path.abspath(manifest_path)
+        self.project_dir = os.path.dirname(self.manifest_path)
+        with open(self.manifest_path, "r") as f:
+            content = f.read()
+        self.manifest = json.loads(content) if content.strip() else {}
+        self.profile = profile or self.manifest.get("profile", DEFAULT_PROFILE)
+        # Extra flags (e.g. -pg for profiling) apply to compiling and linking alike.
+        self.flags = profile_flags(self.profile) + list(extra_flags or [])
+        self.output_name = self.manifest.get("output") or os.path.splitext(os.path.basename(self.manifest_path))[0]
+        tree_id = hashlib.sha256(self.manifest_path.encode()).hexdigest()[:16]
+        variant = self.profile
+        if extra_flags:
+            variant += "-" + hashlib.sha256("\0".join(extra_flags).encode()).hexdigest()[:8]
+        self.build_dir = os.path.join(build_root, f"{self.output_name}-{tree_id}", variant)
+
+    def sources(self) -> List[str]:
+        """
+        Get the translation units of the project, sorted, as absolute paths.
+        """
+        found = set()
+        for pattern in self.manifest.get("sources", DEFAULT_SOURCES):
+            for path in glob.glob(os.path.join(self.project_dir, pattern), recursive=True):
+                relative_parts = os.path.relpath(path, self.project_dir).split(os.sep)
+                if any(part in IGNORED_DIRS or part.startswith(".") for part in relative_parts[:-1]):
+                    continue
+                if os.path.splitext(path)[1] in C_EXTENSIONS | CPP_EXTENSIONS and os.path.isfile(path):
+                    found.add(os.path.abspath(path))
+        return sorted(found)
+
+    def compile_command(self, source: str, object_path: str) -> List[str]:
+        compiler = "gcc" if os.path.splitext(source)[1] in C_EXTENSIONS else "g++"
+        command = [compiler, *self.flags, "-MMD", "-MF", object_path[:-2] + ".d"]
+        command += [f"-I{os.path.join(self.project_dir, path)}" for path in self.manifest.get("include_dirs", [])]
+        command += [f"-D{define}" for define in self.manifest.get("defines", [])]
+        command += self.manifest.get("cflags", [])
+        return command + ["-c", source, "-o", object_path]
+
+    def link_command(self, sources: List[str], objects: List[str]) -> List[str]:
+        uses_cpp = any(os.path.splitext(source)[1] in CPP_EXTENSIONS for source in sources)
+        linker = "g++" if uses_cpp else "gcc"
+        return [linker, *self.flags, *objects, "-o", self.executable_path(), *self.manifest.get("ldflags", [])]
+
+    def executable_path(self) -> str:
+        return os.path.join(self.build_dir, self.output_name)
+
+    def object_path(self, source: str) -> str:
+        relative = os.path.relpath(source, self.project_dir)
+        return os.path.join(self.build_dir, "objects", relative + ".o")
+
+    def is_stale(self, target: str, command: List[str], prerequisites: List[str]) -> bool:
+        """
+        Check whether target must be rebuilt: it is missing, was built by a different command,
+        or one of its prerequisites is newer (or gone).
+        """
+        try:
+            target_mtime = os.stat(target).st_mtime_ns
+            with open(target + ".cmd", "r") as f:
+                if f.read() != "\0".join(command):
+                    return True
+        except FileNotFoundError:
+            return True
+        for path in prerequisites:
+            try:
+                if os.stat(path).st_mtime_ns > target_mtime:
+                    return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    async def build(self, run_process: RunProcess, jobs: int = DEFAULT_JOBS) -> Dict:
+        """
+        Bring the executable up to date.
+
+        Args:
+            run_process: Coroutine function running a command (and cwd) under the compile limits.
+            jobs: Maximum number of translation units compiled concurrently.
+
+        Returns:
+            A dictionary with "executable", "status" ("hit", "incremental" or "miss"), "units_total",
+            "units_compiled", "native_build_ms" and "build_profile". When a step failed, "error" holds the
+            failing CompletedProcess results and "return_code" the first non-zero exit code.
+        """
+        start = time.perf_counter()
+        sources = self.sources()
+        if not sources:
+            raise ValueError(f"No C/C++ sources found for project '{self.manifest_path}'")
+        objects = [self.object_path(source) for source in sources]
+
+        stale = []
+        for source, object_path in zip(sources, objects):
+            command = self.compile_command(source, object_path)
+            # Depfile paths may be relative to the directory the compiler ran in.
+            prerequisites = [os.path.join(self.project_dir, path) for path in parse_depfile(object_path[:-2] + ".d")] or [source]
+            if self.is_stale(object_path, command, prerequisites):
+                stale.append((source, object_path, command))
+
+        semaphore = asyncio.Semaphore(max(1, jobs))
+
+        async def compile_unit(source: str, object_path: str, command: List[str]) -> subprocess.CompletedProcess:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            async with semaphore:
+                print(f"Compiling unit: {' '.join(command)}")
+                result = await run_process(command, self.project_dir)
+            if result.returncode == 0:
+                with open(object_path + ".cmd", "w") as f:
+                    f.write("\0".join(command))
+            else:
+                # Make sure a failed unit is retried next time.
+                for leftover in (object_path, object_path + ".cmd"):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+            return result
+
+        results = await asyncio.gather(*(compile_unit(*unit) for unit in stale))
+        failures = [result for result in results if result.returncode != 0]
+        summary = {
+            "executable": self.executable_path(),
+            "units_total": len(sources),
+            "units_compiled": len(stale),
+            "build_profile": self.profile,
+        }
+        if failures:
+            summary.update(status="miss", error=failures, return_code=failures[0].returncode)
+            summary["native_build_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            return summary
+
+        link_command = self.link_command(sources, objects)
+        relinked = self.is_stale(self.executable_path(), link_command, objects)
+        if relinked:
+            print(f"Linking: {' '.join(link_command)}")
+            link_result = await run_process(link_command, self.project_dir)
+            if link_result.returncode != 0:
+                summary.update(status="miss", error=[link_result], return_code=link_result.returncode)
+                summary["native_build_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                return summary
+            with open(self.executable_path() + ".cmd", "w") as f:
+                f.write("\0".join(link_command))
+
+        if not stale and not relinked:
+            summary["status"] = "hit"
+        elif len(stale) == len(sources):
+            summary["status"] = "miss"
+        else:
+            summary["status"] = "incremental"
+        summary["native_build_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return summary
+
+
+# One build at a time per project tree; concurrent requests wait and then see an up-to-date build.
+_project_locks: Dict[str, list] = {}  # build dir -> [asyncio.Lock, tasks holding or waiting for it]
+
+
+async def build_project(manifest_path: str, run_process: RunProcess, profile: str | None = None, extra_flags: List[str] | None = None) -> Dict:
+    """
+    Build the project described by manifest_path incrementally. See NativeProject.build.
+    """
+    project = NativeProject(manifest_path, profile=profile, extra_flags=extra_flags)
+    building = _project_locks.setdefault(project.build_dir, [asyncio.Lock(), 0])
+    building[1] += 1
+    try:
+        async with building[0]:
+            return await project.build(run_process)
+    finally:
+        # Only dropped once nobody waits on it, so a queued build never runs beside a new one.
+        building[1] -= 1
+        if building[1] == 0 and _project_locks.get(project.build_dir) is building:
+            del _project_locks[project.build_dir]
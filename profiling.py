@@ -0,0 +1,191 @@
+import io
+import os
+import re
+import glob
+import shutil
+import pstats
+from typing import List
+
+from sandbox import COMPILE_LIMITS, run_limited
+
+DEFAULT_TOP_N = int(os.environ.get("CODING_MASTER_PROFILE_TOP_N", 10))
+
+# Extra compiler/linker flag that makes C/C++ binaries write gprof data on exit.
+GPROF_FLAGS = ["-pg"]
+PROFILED_LANGUAGES = {"python", "c", "cpp", "native"}
+
+# A primary line of the gprof call graph: [index] %time self children called name [index]
+CALL_GRAPH_ENTRY = re.compile(r"^\[\d+\]\s+[\d.]+\s+([\d.]+)\s+([\d.]+)\s+(?:(\d+(?:\+\d+)?)\s+)?(.+?)\s+\[\d+\]\s*$")
+
+
+def python_profile_command(script_path: str, output_path: str) -> List[str]:
+    """
+    Command that runs a script under cProfile and saves the stats to output_path.
+    The script still sees itself as __main__ with its own path in sys.argv[0].
+    """
+    return ["python3", "-m", "cProfile", "-o", output_path, os.path.abspath(script_path)]
+
+
+def perf_stat_command(command: List[str], output_path: str) -> List[str] | None:
+    """
+    Wrap command in `perf stat` (CSV output to output_path), or None if perf isn't installed.
+    """
+    if shutil.which("perf") is None:
+        return None
+    return ["perf", "stat", "-x", ",", "-o", output_path, "--", *command]
+
+
+def gprof_environment(prefix: str) -> dict:
+    # glibc writes gmon data to <prefix>.<pid> instead of ./gmon.out in the program's directory.
+    return {**os.environ, "GMON_OUT_PREFIX": prefix}
+
+
+def _function_entry(function: str, calls, self_s: float, cumulative_s: float | None) -> dict:
+    entry = {"function": function, "calls": calls, "self_s": round(self_s, 6)}
+    if cumulative_s is not None:
+        entry["cumulative_s"] = round(cumulative_s, 6)
+    return entry
+
+
+def summarize_cprofile(stats_path: str, top_n: int = DEFAULT_TOP_N) -> dict:
+    """
+    Summarize a cProfile stats file.
+
+    Args:
+        stats_path: File written by `python -m cProfile -o`.
+        top_n: Number of functions to list in each ranking.
+
+    Returns:
+        {"tool": "cProfile", "total_calls", "total_s", "by_self_time": [...], "by_cumulative_time": [...],
+        "full_profile": text of all functions sorted by cumulative time}. Each function entry has
+        "function" (file:line(name)), "calls", "self_s" and "cumulative_s".
+    """
+    full = io.StringIO()
+    stats = pstats.Stats(stats_path, stream=full)
+    entries = []
+    for (file_name, line, name), (primitive_calls, calls, self_s, cumulative_s, _) in stats.stats.items():
+        function = name if file_name == "~" else f"{os.path.basename(file_name)}:{line}({name})"
+        call_count = calls if calls == primitive_calls else f"{calls}/{primitive_calls}"
+        entries.append(_function_entry(function, call_count, self_s, cumulative_s))
+    stats.sort_stats("cumulative").print_stats()
+    return {
+        "tool": "cProfile",
+        "total_calls": stats.total_calls,
+        "total_s": round(stats.total_tt, 6),
+        "by_self_time": sorted(entries, key=lambda entry: entry["self_s"], reverse=True)[:top_n],
+        "by_cumulative_time": sorted(entries, key=lambda entry: entry["cumulative_s"], reverse=True)[:top_n],
+        "full_profile": full.getvalue(),
+    }
+
+
+def parse_gprof_flat(text: str) -> List[dict]:
+    """
+    Parse the flat profile section of `gprof -b` output into function entries with their self
+    time and call count. Cumulative times come from the call graph (parse_gprof_call_graph): the
+    flat profile only has rounded per-call figures in a unit that depends on their magnitude.
+    """
+    entries = []
+    in_flat_profile = False
+    for line in text.splitlines():
+        if line.startswith("Flat profile"):
+            in_flat_profile = True
+            continue
+        if in_flat_profile and (line.strip() == "Call graph" or line.startswith("\f")):
+            break
+        parts = line.split()
+        if not in_flat_profile or len(parts) < 4:
+            continue
+        try:
+            float(parts[0])
+            self_s = float(parts[2])
+        except ValueError:
+            continue  # header lines
+        if len(parts) >= 7:
+            calls, name = int(parts[3]), " ".join(parts[6:])
+        else:
+            calls, name = None, " ".join(parts[3:])
+        entries.append(_function_entry(name, calls, self_s, None))
+    return entries
+
+
+def parse_gprof_call_graph(text: str) -> List[dict]:
+    """
+    Parse the primary lines of the call graph section of `gprof -b` output: one entry per
+    function with its self time and cumulative (self + children) time in seconds.
+    """
+    entries = []
+    in_call_graph = False
+    for line in text.splitlines():
+        if line.strip() == "Call graph":
+            in_call_graph = True
+            continue
+        if in_call_graph and line.startswith("Index by function name"):
+            break
+        match = CALL_GRAPH_ENTRY.match(line) if in_call_graph else None
+        if match is None:
+            continue
+        self_s, children_s, called, name = match.groups()
+        calls = int(called) if called and called.isdigit() else called
+        entries.append(_function_entry(name, calls, float(self_s), float(self_s) + float(children_s)))
+    return entries
+
+
+async def summarize_gprof(executable: str, gmon_prefix: str, top_n: int = DEFAULT_TOP_N) -> dict:
+    """
+    Run gprof on the data a `-pg` binary wrote and summarize it.
+
+    Args:
+        executable: The profiled binary.
+        gmon_prefix: The GMON_OUT_PREFIX the program ran with.
+        top_n: Number of functions to list in each ranking.
+
+    Returns:
+        {"tool": "gprof", "by_self_time", "by_cumulative_time", "full_profile"}, or {"error": ...}
+        when there is no profile data.
+    """
+    gmon_files = sorted(glob.glob(gmon_prefix + ".*"), key=os.path.getmtime)
+    if not gmon_files:
+        return {"tool": "gprof", "error": "No profile data was written (the program did not exit normally)."}
+    if shutil.which("gprof") is None:
+        return {"tool": "gprof", "error": "gprof is not installed."}
+    result = await run_limited(["gprof", "-b", executable, gmon_files[-1]], limits=COMPILE_LIMITS)
+    if result.returncode != 0:
+        return {"tool": "gprof", "error": result.stderr.strip() or f"gprof exited with {result.returncode}"}
+    entries = parse_gprof_flat(result.stdout)
+    call_graph = parse_gprof_call_graph(result.stdout)
+    cumulative_by_function = {entry["function"]: entry["cumulative_s"] for entry in call_graph}
+    for entry in entries:
+        if entry["function"] in cumulative_by_function:
+            entry["cumulative_s"] = cumulative_by_function[entry["function"]]
+    summary = {
+        "tool": "gprof",
+        "by_self_time": sorted(entries, key=lambda entry: entry["self_s"], reverse=True)[:top_n],
+        # From the call graph, which also lists callers without samples of their own (e.g. main).
+        "by_cumulative_time": sorted(call_graph, key=lambda entry: entry["cumulative_s"], reverse=True)[:top_n],
+        "full_profile": result.stdout,
+    }
+    if not entries:
+        summary["note"] = "No samples were taken; gprof samples every 10 ms, so very short runs show no functions."
+    return summary
+
+
+def parse_perf_stat(output_path: str) -> dict:
+    """
+    Parse `perf stat -x ,` output into {event: value}.
+    """
+    counters = {}
+    try:
+        with open(output_path, "r") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return counters
+    for line in lines:
+        fields = line.split(",")
+        if len(fields) < 3 or line.startswith("#"):
+            continue
+        value, unit, event = fields[0], fields[1], fields[2]
+        try:
+            counters[event + (f" ({unit})" if unit else "")] = float(value)
+        except ValueError:
+            counters[event] = value  # e.g. "<not supported>"
+    return counters
@@ -0,0 +1,256 @@
+import os
+import sys
+import json
+import signal
+import asyncio
+import tempfile
+import subprocess
+from typing import List
+
+from sandbox import DEFAULT_LIMITS, ExecutionLimits, kill_process_group
+
+# Opt-in: number of pre-warmed python3 workers (0 disables the pool).
+DEFAULT_POOL_SIZE = int(os.environ.get("CODING_MASTER_PYTHON_POOL", 0))
+# A worker is replaced after this many scripts, or as soon as a script leaks state.
+DEFAULT_MAX_RUNS = int(os.environ.get("CODING_MASTER_PYTHON_POOL_MAX_RUNS", 50))
+
+# Imported once per worker so small scripts don't pay for them on every run.
+PRELOADED_MODULES = [
+    "collections", "dataclasses", "datetime", "functools", "io", "itertools", "json", "math",
+    "os", "pathlib", "random", "re", "string", "sys", "time", "traceback", "typing",
+]
+
+
+# Address-space and open-file caps hold for a worker's whole life; CPU time would accumulate
+# across scripts, so runs are bounded by the wall-clock timeout instead. Output goes to files,
+# so the output cap becomes a file-size cap (SIGXFSZ past it).
+WORKER_LIMITS = DEFAULT_LIMITS.replace(cpu_seconds=None, max_file_bytes=DEFAULT_LIMITS.max_output_bytes)
+
+
+class PythonWorkerPool:
+    """
+    Pool of python3 processes with common stdlib modules already imported.
+
+    Each worker runs one script at a time in a fresh namespace, with the script's directory as
+    cwd and first on sys.path. stdout/stderr are redirected at the file-descriptor level into
+    temp files owned by the pool, so output survives even if the script kills its worker.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, max_runs: int = DEFAULT_MAX_RUNS):
+        self.size = size
+        self.max_runs = max_runs
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._idle: asyncio.Queue | None = None
+        self._workers: List[asyncio.subprocess.Process] = []
+        self.recycled = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    async def _spawn(self) -> asyncio.subprocess.Process:
+        worker = await asyncio.create_subprocess_exec(
+            *WORKER_LIMITS.wrap(["python3", os.path.abspath(__file__)]),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        worker.runs = 0
+        self._workers.append(worker)
+        return worker
+
+    async def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        # Workers are bound to the event loop that spawned them.
+        self.shutdown()
+        self._loop = loop
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._idle.put_nowait(await self._spawn())
+
+    def _retire(self, worker: asyncio.subprocess.Process) -> None:
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if worker.returncode is None:
+            kill_process_group(worker.pid)
+        self.recycled += 1
+
+    async def run(self, script_path: str, limits: ExecutionLimits = DEFAULT_LIMITS, source: str | None = None) -> subprocess.CompletedProcess:
+        """
+        Run a Python script on a warm worker.
+
+        Args:
+            script_path: Full path to the .py file.
+            limits: The wall-clock timeout and output cap are enforced per run; a worker that
+                times out is killed and replaced.
+            source: The script's text if the caller already has it; the worker reads the file otherwise.
+
+        Returns:
+            A subprocess.CompletedProcess with the script's return code and decoded output,
+            plus the timed_out and limit_exceeded attributes set by sandbox.run_limited.
+        """
+        await self._ensure_started()
+        worker = await self._idle.get()
+        script_path = os.path.abspath(script_path)
+        output_paths = []
+        for _ in range(2):
+            fd, output_path = tempfile.mkstemp(prefix="pyworker-")
+            os.close(fd)
+            output_paths.append(output_path)
+        recycle = True
+        timed_out = False
+        try:
+            request = {"path": script_path, "stdout": output_paths[0], "stderr": output_paths[1], "source": source}
+            worker.stdin.write((json.dumps(request) + "\n").encode())
+            await worker.stdin.drain()
+            try:
+                line = await asyncio.wait_for(worker.stdout.readline(), limits.timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                kill_process_group(worker.pid)
+                line = b""
+            if line:
+                reply = json.loads(line)
+                returncode = reply["returncode"]
+                worker.runs += 1
+                recycle = reply["leaked"] or worker.runs >= self.max_runs
+            else:
+                # The script took the worker down with it (os._exit, fatal signal, ...).
+                returncode = await worker.wait()
+        finally:
+            if recycle:
+                self._retire(worker)
+                self._idle.put_nowait(await self._spawn())
+            else:
+                self._idle.put_nowait(worker)
+
+        outputs = []
+        remaining = limits.max_output_bytes
+        output_exceeded = False
+        for output_path in output_paths:
+            with open(output_path, "rb") as f:
+                data = f.read() if remaining is None else f.read(remaining + 1)
+            if remaining is not None:
+                output_exceeded = output_exceeded or len(data) > remaining
+                data = data[:remaining]
+                remaining -= len(data)
+            outputs.append(data.decode(errors="replace"))
+            os.remove(output_path)
+        result = subprocess.CompletedProcess(["python3", script_path], returncode, outputs[0], outputs[1])
+        result.timed_out = timed_out
+        result.limit_exceeded = "output" if output_exceeded or returncode == -signal.SIGXFSZ else None
+        return result
+
+    def shutdown(self) -> None:
+        for worker in list(self._workers):
+            self._retire(worker)
+        self._loop = None
+        self._idle = None
+
+    async def aclose(self) -> None:
+        """
+        Stop all workers and wait for them to exit; call before the owning event loop closes.
+        """
+        workers = list(self._workers)
+        self.shutdown()
+        for worker in workers:
+            await worker.wait()
+
+    def stats(self) -> dict:
+        return {"size": self.size, "max_runs": self.max_runs, "live_workers": len(self._workers), "recycled": self.recycled}
+
+
+python_pool = PythonWorkerPool()
+
+
+def _worker_main() -> None:
+    import io
+    import builtins
+    import threading
+    import traceback
+    import importlib
+
+    for module_name in PRELOADED_MODULES:
+        importlib.import_module(module_name)
+    # Don't let this repository's modules shadow the scripts' own imports.
+    sys.path.pop(0)
+
+    # Keep private copies of the protocol pipes, then point fds 0/1 away from them so
+    # scripts can't read requests or corrupt replies.
+    requests = os.fdopen(os.dup(0), "r")
+    replies = os.fdopen(os.dup(1), "w")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    worker_dir = os.getcwd()
+    baseline_modules = dict(sys.modules)
+    baseline_builtins = dict(vars(builtins))
+
+    for line in requests:
+        request = json.loads(line)
+        script_path = request["path"]
+        script_dir = os.path.dirname(script_path)
+        for fd, output_path in ((1, request["stdout"]), (2, request["stderr"])):
+            output_fd = os.open(output_path, os.O_WRONLY)
+            os.dup2(output_fd, fd)
+            os.close(output_fd)
+        sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False))
+        sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), line_buffering=True)
+        sys.stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), line_buffering=True)
+
+        saved_path, saved_argv, saved_environ = list(sys.path), list(sys.argv), dict(os.environ)
+        sys.path.insert(0, script_dir)
+        sys.argv = [script_path]
+        os.chdir(script_dir)
+        namespace = {"__name__": "__main__", "__file__": script_path, "__builtins__": builtins}
+        returncode = 0
+        try:
+            if request.get("source") is not None:
+                code = compile(request["source"], script_path, "exec")
+            else:
+                with open(script_path, "rb") as f:
+                    code = compile(f.read(), script_path, "exec")
+            exec(code, namespace)
+        except SystemExit as e:
+            if e.code is None:
+                returncode = 0
+            elif isinstance(e.code, int):
+                returncode = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                returncode = 1
+        except BaseException as e:
+            # Drop this frame so the traceback matches a plain `python3 script.py` run.
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            returncode = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(devnull, 1)
+            os.dup2(devnull, 2)
+
+        leaked = (
+            threading.active_count() > 1
+            or any(sys.modules.get(name) is not module for name, module in baseline_modules.items())
+            or vars(builtins).keys() != baseline_builtins.keys()
+        )
+        for name in set(sys.modules) - set(baseline_modules):
+            del sys.modules[name]
+        sys.path[:], sys.argv = saved_path, saved_argv
+        os.chdir(worker_dir)
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        namespace.clear()
+
+        replies.write(json.dumps({"returncode": returncode, "leaked": leaked}) + "\n")
+        replies.flush()
+        if leaked:
+            break
+
+
+if __name__ == "__main__":
+    _worker_main()
@@ -0,0 +1,309 @@
+import os
+import sys
+import shutil
+import signal
+import asyncio
+import codecs
+import resource
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from streaming import CHUNK_SIZE, DEFAULT_BUFFER_BYTES, HeadTailBuffer, OutputCallback
+
+
+def _env_number(name: str, default):
+    # Setting a limit to 0 in the environment disables it.
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    number = float(value) if "." in value else int(value)
+    return number if number > 0 else None
+
+
+class ExecutionLimits:
+    """
+    Resource limits for one process: wall-clock timeout (seconds), RLIMIT_CPU (seconds),
+    RLIMIT_AS (bytes), RLIMIT_NOFILE and a cap on total stdout + stderr bytes, plus an
+    optional niceness increment for low-priority work and RLIMIT_FSIZE (bytes) for processes
+    whose output goes to files. A limit of None is not enforced.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        cpu_seconds: int | None = None,
+        memory_bytes: int | None = None,
+        max_open_files: int | None = None,
+        max_output_bytes: int | None = None,
+        nice: int | None = None,
+        max_file_bytes: int | None = None,
+    ):
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.max_open_files = max_open_files
+        self.max_output_bytes = max_output_bytes
+        self.nice = nice
+        self.max_file_bytes = max_file_bytes
+
+    def replace(self, **changes) -> "ExecutionLimits":
+        values = dict(vars(self))
+        values.update(changes)
+        return ExecutionLimits(**values)
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    def rlimits(self) -> List[tuple]:
+        """
+        Get the (name, resource, soft, hard) rlimits to set, lowered to what this process may grant.
+        """
+        def lower(name: str, limit: int, soft: int, hard: int | None = None) -> tuple:
+            current_hard = resource.getrlimit(limit)[1]
+            if current_hard != resource.RLIM_INFINITY:
+                soft = min(soft, current_hard)
+                hard = current_hard if hard is None else min(hard, current_hard)
+            return name, limit, soft, soft if hard is None else hard
+
+        rlimits = []
+        if self.cpu_seconds:
+            # SIGXCPU at the soft limit, SIGKILL one second later if it is ignored.
+            rlimits.append(lower("cpu", resource.RLIMIT_CPU, int(self.cpu_seconds), int(self.cpu_seconds) + 1))
+        if self.memory_bytes:
+            rlimits.append(lower("as", resource.RLIMIT_AS, int(self.memory_bytes)))
+        if self.max_open_files:
+            rlimits.append(lower("nofile", resource.RLIMIT_NOFILE, int(self.max_open_files)))
+        if self.max_file_bytes:
+            rlimits.append(lower("fsize", resource.RLIMIT_FSIZE, int(self.max_file_bytes)))
+        return rlimits
+
+    def wrap(self, command: List[str]) -> List[str]:
+        """
+        Prefix a command so its rlimits and niceness are in place before it is exec'd: with
+        prlimit(1) and nice(1) where available, otherwise with a small Python launcher. Setting
+        them from the parent after the process has started would race with the program, and a
+        preexec_fn isn't safe while the server's other threads are running.
+        """
+        rlimits = self.rlimits()
+        if not rlimits and not self.nice:
+            return list(command)
+        if _PRLIMIT and (_NICE or not self.nice):
+            prefix = [_PRLIMIT] + [f"--{name}={soft}:{hard}" for name, _, soft, hard in rlimits] + ["--"]
+            if self.nice:
+                prefix += [_NICE, "-n", str(int(self.nice))]
+            return prefix + list(command)
+        launcher = "import os, sys, resource\n"
+        launcher += "".join(f"resource.setrlimit({limit}, ({soft}, {hard}))\n" for _, limit, soft, hard in rlimits)
+        if self.nice:
+            launcher += f"os.nice({int(self.nice)})\n"
+        launcher += "os.execvp(sys.argv[1], sys.argv[1:])\n"
+        return [sys.executable, "-I", "-S", "-c", launcher] + list(command)
+
+
+# Limits are applied by exec'ing through these before the program itself.
+_PRLIMIT = shutil.which("prlimit")
+_NICE = shutil.which("nice")
+
+
+# Limits for running user programs. Override with CODING_MASTER_TIMEOUT, CODING_MASTER_CPU_SECONDS,
+# CODING_MASTER_MEMORY_BYTES, CODING_MASTER_MAX_OPEN_FILES and CODING_MASTER_MAX_OUTPUT_BYTES.
+DEFAULT_LIMITS = ExecutionLimits(
+    timeout=_env_number("CODING_MASTER_TIMEOUT", 30.0),
+    cpu_seconds=_env_number("CODING_MASTER_CPU_SECONDS", 30),
+    memory_bytes=_env_number("CODING_MASTER_MEMORY_BYTES", 2 * 1024 * 1024 * 1024),
+    max_open_files=_env_number("CODING_MASTER_MAX_OPEN_FILES", 256),
+    max_output_bytes=_env_number("CODING_MASTER_MAX_OUTPUT_BYTES", 10 * 1024 * 1024),
+)
+
+# Compilers only get a (longer) wall-clock timeout and the output cap.
+COMPILE_LIMITS = ExecutionLimits(
+    timeout=_env_number("CODING_MASTER_COMPILE_TIMEOUT", 300.0),
+    max_output_bytes=DEFAULT_LIMITS.max_output_bytes,
+)
+
+# The JVM and the .NET runtime reserve far more address space than they use, so RLIMIT_AS
+# would stop them from starting; they are only held to the other limits.
+NO_ADDRESS_SPACE_LIMIT_LANGUAGES = {"java", "csharp"}
+
+# Once the process itself has exited, how long to keep reading output from descendants that
+# still hold its pipes before the rest of its process group is killed.
+PIPE_GRACE_SECONDS = 0.5
+
+# /proc/<pid>/status is sampled for VmHWM at this interval, backing off from the first.
+PEAK_RSS_SAMPLE_SECONDS = (0.005, 0.1)
+
+# wait4() blocks, so each running process parks one thread here until it exits.
+_reaper = ThreadPoolExecutor(max_workers=64, thread_name_prefix="wait4")
+
+
+def read_peak_rss_kb(pid: int) -> int | None:
+    """
+    Get a process's VmHWM (peak resident set size in kB since its last exec), or None once it
+    has exited or if /proc isn't available.
+    """
+    try:
+        with open(f"/proc/{pid}/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def kill_process_group(pid: int) -> None:
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_limited(
+    command: List[str],
+    cwd: str | None = None,
+    limits: ExecutionLimits = DEFAULT_LIMITS,
+    on_output: OutputCallback | None = None,
+    buffer_limit: int = DEFAULT_BUFFER_BYTES,
+    env: dict | None = None,
+) -> subprocess.CompletedProcess:
+    """
+    Run a command in its own process group under the given limits.
+
+    Args:
+        command: The command and its arguments.
+        cwd: Working directory for the process.
+        limits: Timeout, rlimits and output cap to enforce.
+        on_output: Optional coroutine called with ("stdout" | "stderr", text) for every chunk.
+            When given, only the head and tail of each stream (buffer_limit characters each)
+            are kept for the result.
+        buffer_limit: Characters kept from the head and the tail of each stream when streaming.
+        env: Environment for the process (defaults to this process's environment).
+
+    Returns:
+        A subprocess.CompletedProcess with decoded stdout/stderr and these extra attributes:
+        timed_out (bool), limit_exceeded (None, "cpu" or "output"), peak_rss_kb, cpu_time_s
+        and omitted (characters dropped from streamed output). peak_rss_kb is exact once the
+        program outgrows this server; below that it is sampled, so it can fall short for runs of
+        a few milliseconds and is None if none was taken.
+    """
+    loop = asyncio.get_running_loop()
+    # The wrapper would report a missing program itself; keep raising FileNotFoundError like Popen does.
+    program = command[0] if os.sep not in command[0] else os.path.join(cwd or "", command[0])
+    if shutil.which(program, path=os.pathsep.join(os.get_exec_path(env))) is None:
+        raise FileNotFoundError(f"No such file or directory: '{command[0]}'")
+    process = subprocess.Popen(
+        limits.wrap(command),
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,  # the process leads its own group, so killpg reaches its children
+    )
+    # The child's ru_maxrss starts from this process's peak, which the kernel carries across
+    # fork and exec, so it only measures the program once it is above that.
+    inherited_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    reap = loop.run_in_executor(_reaper, os.wait4, process.pid, 0)
+
+    sampled_rss_kb = None
+
+    async def sample_peak_rss() -> None:
+        nonlocal sampled_rss_kb
+        interval, max_interval = PEAK_RSS_SAMPLE_SECONDS
+        while True:
+            peak_rss_kb = read_peak_rss_kb(process.pid)
+            if peak_rss_kb is not None:
+                sampled_rss_kb = max(sampled_rss_kb or 0, peak_rss_kb)
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, max_interval)
+
+    sampler = asyncio.ensure_future(sample_peak_rss())
+
+    output_bytes = 0
+    output_exceeded = False
+    transports = []
+    # Per-stream state lives out here so whatever was read survives a timeout.
+    collected = {"stdout": [], "stderr": []}
+    buffers = {name: HeadTailBuffer(buffer_limit) for name in collected} if on_output is not None else None
+
+    async def pump(pipe, name: str) -> None:
+        nonlocal output_bytes, output_exceeded
+        reader = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+        transports.append(transport)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await reader.read(CHUNK_SIZE)
+            if output_exceeded:
+                if not chunk:
+                    break
+                continue  # keep draining until the killed process closes the pipe
+            if limits.max_output_bytes and output_bytes + len(chunk) > limits.max_output_bytes:
+                chunk = chunk[:limits.max_output_bytes - output_bytes]
+                output_exceeded = True
+                kill_process_group(process.pid)
+            output_bytes += len(chunk)
+            if buffers is None:
+                collected[name].append(chunk)
+            else:
+                text = decoder.decode(chunk, final=not chunk)
+                if text:
+                    buffers[name].write(text)
+                    await on_output(name, text)
+            if not chunk:
+                break
+
+    pumps = asyncio.gather(pump(process.stdout, "stdout"), pump(process.stderr, "stderr"))
+    timed_out = False
+    try:
+        # The run ends when the process itself exits, even if a background child keeps the pipes open.
+        _, status, usage = await asyncio.wait_for(asyncio.shield(reap), limits.timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        kill_process_group(process.pid)
+        _, status, usage = await reap
+    except BaseException:
+        kill_process_group(process.pid)
+        pumps.cancel()
+        raise
+    finally:
+        sampler.cancel()
+
+    process.returncode = os.waitstatus_to_exitcode(status)
+    try:
+        await asyncio.wait_for(asyncio.shield(pumps), PIPE_GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        kill_process_group(process.pid)
+        try:
+            # Anything still holding the pipes now left the process group; don't wait for it.
+            await asyncio.wait_for(pumps, PIPE_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+    finally:
+        for transport in transports:
+            transport.close()
+
+    if buffers is None:
+        stdout, stderr = (b"".join(collected[name]).decode(errors="replace") for name in ("stdout", "stderr"))
+        omitted = 0
+    else:
+        stdout, stderr = buffers["stdout"].getvalue(), buffers["stderr"].getvalue()
+        omitted = buffers["stdout"].omitted + buffers["stderr"].omitted
+
+    cpu_time = usage.ru_utime + usage.ru_stime
+    limit_exceeded = None
+    if output_exceeded:
+        limit_exceeded = "output"
+    elif process.returncode == -signal.SIGXCPU or (
+        process.returncode == -signal.SIGKILL and limits.cpu_seconds and cpu_time >= limits.cpu_seconds
+    ):
+        limit_exceeded = "cpu"
+
+    result = subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+    result.timed_out = timed_out
+    result.limit_exceeded = limit_exceeded
+    result.peak_rss_kb = usage.ru_maxrss if usage.ru_maxrss > inherited_rss_kb else sampled_rss_kb
+    result.cpu_time_s = round(cpu_time, 3)
+    result.omitted = omitted
+    return result
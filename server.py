@@ -1,41 +1,78 @@
+import startup
 import os
-from fastmcp import FastMCP, Context
+import time
+import threading
+with startup.timed_import("fastmcp"):
+    from fastmcp import FastMCP, Context
 from typing import List
-import httpx
-import json
-import asyncio
-from utils import get_code_path, get_code, get_all_code_paths, execute_code
+with startup.timed_import("metrics"):
+    from metrics import instrument_tool, metrics
+
+# Everything else (httpx, the execution stack, the tool docs and generation caches) is imported
+# by the tools that need it, so the server is up before those modules have loaded.
 
 WORKSPACE_DIR = os.getcwd()
 CODE_STORAGE = os.path.join(WORKSPACE_DIR, "example_codes")
-print("Default workspace directory:", WORKSPACE_DIR)
+
+_generation_cache = None
+
+
+def get_generation_cache():
+    global _generation_cache
+    if _generation_cache is None:
+        from generation_cache import GenerationCache
+        # Set CODING_MASTER_GENERATION_CACHE_DISK=1 to also keep generated tools in SQLite under CODE_STORAGE.
+        _generation_cache = GenerationCache(
+            db_path=os.path.join(CODE_STORAGE, ".generation_cache.sqlite3")
+            if os.environ.get("CODING_MASTER_GENERATION_CACHE_DISK") == "1" else None
+        )
+    return _generation_cache
+
+_blob_store = None
+
+
+def get_blob_store():
+    global _blob_store
+    if _blob_store is None:
+        from blob_store import BlobStore
+        # Hidden directory, so the code catalog and list_codes skip it.
+        _blob_store = BlobStore(os.path.join(CODE_STORAGE, ".blobs"))
+    return _blob_store
+
+_workspace_watcher = None
+
+
+def get_workspace_watcher():
+    global _workspace_watcher
+    if _workspace_watcher is None:
+        from workspace_watcher import WorkspaceWatcher
+        _workspace_watcher = WorkspaceWatcher(CODE_STORAGE)
+    return _workspace_watcher
 
 mcp = FastMCP("🛠️🤖 Your Coding Master 🤖🛠️")
 
 @mcp.tool()
+@instrument_tool
 async def fetch_and_save_tool_info(ctx: Context, url: str = "https://gofastmcp.com/servers/tools", output_file: str = "tool_info.json"):
     """
     Fetch all information from the given URL and save it to a file.
+    The saved copy is reused for a while and then revalidated with ETag/Last-Modified.
 
     Args:
         url (str): The URL to fetch the data from.
         output_file (str): The name of the file to save the data to.
     """
+    import json
+    import httpx
+    from http_cache import fetch_json_cached
+
     output_file = os.path.join(CODE_STORAGE, output_file)
     try:
-        # Fetch data from the URL
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()  # Raise an error for HTTP issues
-        
-        # Parse the response content (assuming it's JSON)
-        data = response.json()
+        # Fetch data from the URL through the shared client; unchanged documents are
+        # revalidated with a conditional request and not rewritten.
+        status = await fetch_json_cached(url, output_file)
         
-        # Save the data to a file
-        with open(output_file, "w") as file:
-            json.dump(data, file, indent=4)
-        
-        print(f"Tool information successfully saved to '{output_file}'.")
+        print(f"Tool information in '{output_file}' is up to date ({status}).")
         
         print("Reading the tool documentation...")
         
@@ -69,29 +106,63 @@ def get_code_writer_profile(ctx: Context) -> dict:
 
 
 @mcp.tool()
-async def write_me_a_mcp_tool(tool_desc: str, ctx: Context) -> str:
+@instrument_tool
+async def write_me_a_mcp_tool(tool_desc: str, ctx: Context, use_cache: bool = True) -> str:
     """
     Write an MCP tool based on the tool description provided.
+    Answers are cached per (normalized description, tool documentation, model); pass
+    use_cache=False to generate a fresh answer and replace the cached one.
     """
+    from tool_docs import load_tool_docs
+    from generation_cache import make_key as make_generation_key
+
+    generation_cache = get_generation_cache()
     tool_info_path = os.path.join(CODE_STORAGE, "tool_info.json")
     
     if not os.path.exists(tool_info_path):
         # Fetch the data from the URL and save it to a file for the tools document
         await fetch_and_save_tool_info(ctx)
     
-    # Read the tool info file
-    with open(tool_info_path, "r") as file:
-        tool_info = json.load(file)
+    # Parsed and indexed once, then reused until the file changes
+    tool_docs = load_tool_docs(tool_info_path)
+    
+    # Generate the tool based on the concept, with only the documentation sections relevant to it
+    tool_info = tool_docs.compact(tool_desc)
+    prompt = f"Generate a tool for the description: {tool_desc}. The tool should be based on the following information:\n{tool_info}"
     
-    # Generate the tool based on the concept
-    prompt = f"Generate a tool for the description: {tool_desc}. The tool should be based on the following information: {tool_info}"
+    model_preferences = "claude-3-sonnet"
+    cache_key = make_generation_key(tool_desc, tool_docs.content_hash, model_preferences)
+    if use_cache:
+        cached_response = generation_cache.get(cache_key)
+        if cached_response is not None:
+            return cached_response
     
-    response = await ctx.sample(prompt, model_preferences="claude-3-sonnet")
+    response = await ctx.sample(prompt, model_preferences=model_preferences)
+    response_text = getattr(response, "text", None)
+    if response_text is None:
+        return response
     
-    return response
+    generation_cache.put(cache_key, response_text)
+    return response_text
+
+
+@mcp.tool()
+@instrument_tool
+def clear_generation_cache() -> str:
+    """
+    Drop every cached write_me_a_mcp_tool answer (memory and disk).
+    """
+    get_generation_cache().invalidate()
+    return "Generation cache cleared."
+
+
+@mcp.resource(uri = "cache://generation", name= "Generation Cache Stats", description= "Hit rate and size of the write_me_a_mcp_tool response cache.")
+def get_generation_cache_stats() -> dict:
+    return get_generation_cache().stats()
 
         
 @mcp.tool()
+@instrument_tool
 def list_codes(directory: str = CODE_STORAGE) -> List[str]:
     """
     List all code files in the specified directory.
@@ -100,74 +171,326 @@ def list_codes(directory: str = CODE_STORAGE) -> List[str]:
         directory: The directory to search for code files.
     
     Returns:
-        A list of code file names (without paths).
+        A list of code file names, relative to the directory (files in subdirectories keep their subdirectory prefix).
+        Directories other than the code storage are listed one level deep.
     """
-    # Get all code file paths
-    code_files = get_all_code_paths(directory)
+    from utils import get_all_code_paths
+
+    # Get all code file paths; only the code storage is indexed recursively and cached
+    code_files = get_all_code_paths(directory, recursive=os.path.abspath(directory) == os.path.abspath(CODE_STORAGE))
     
-    # Extract only the file names from the full paths
-    code_names = [os.path.basename(file) for file in code_files]
+    # Strip the directory prefix from the full paths
+    code_names = [os.path.relpath(file, directory) for file in code_files]
     
     return code_names
 
+@mcp.resource(uri = "metrics://server", name= "Server Metrics", description= "Per-tool call counts, errors, in-flight gauges and latency percentiles, plus execute_code phase timings.")
+def get_server_metrics() -> dict:
+    from execution_engine import engine
+
+    snapshot = metrics.snapshot()
+    snapshot["engine"] = engine.stats()
+    return snapshot
+
+
+@mcp.resource(uri = "metrics://server/prometheus", name= "Server Metrics (Prometheus)", description= "The server metrics in Prometheus text exposition format.", mime_type= "text/plain")
+def get_server_metrics_prometheus() -> str:
+    return metrics.prometheus()
+
+
+@mcp.resource(uri = "engine://stats", name= "Execution Engine Stats", description= "Worker limits, queue depth and wait times of the run_code execution engine.")
+def get_engine_stats() -> dict:
+    from execution_engine import engine
+    from python_pool import python_pool
+    from source_loader import source_cache
+
+    stats = engine.stats()
+    stats["python_pool"] = python_pool.stats()
+    stats["source_cache"] = source_cache.stats()
+    return stats
+
+
+def _not_found_result(code_name: str, error: FileNotFoundError) -> dict:
+    # Ensure a consistent dictionary structure for errors
+    return {
+        "code": f"File for '{code_name}' not found.", 
+        "output": str(error), 
+        "code_file_name": f"{code_name} (not found)", 
+        "return_code": -1
+    }
+
+
+async def _attach_cs_display(result: dict, code_path: str) -> None:
+    # If a .csproj was executed, try to load the corresponding .cs file for display.
+    # The build already hashed it through the source cache, so this is usually just a stat.
+    from source_loader import source_cache
+
+    if not result.get("code_file_name", "").endswith(".csproj"):
+        return
+    base_cs_name = os.path.splitext(result["code_file_name"])[0] + ".cs"
+    path_to_cs_display = os.path.join(os.path.dirname(code_path), base_cs_name)
+    try:
+        cs_source = await source_cache.load(path_to_cs_display)
+        result["code_to_display_name"] = base_cs_name
+        result["code_to_display_content"] = cs_source.text
+        result["code_display_message"] = (f"Executed project '{result['code_file_name']}'. "
+                                          f"Displaying content of associated '{base_cs_name}'.")
+    except FileNotFoundError:
+        result.pop("code_to_display_name", None)
+        result["code_display_message"] = (f"Executed project '{result['code_file_name']}'. "
+                                          f"Associated .cs file '{base_cs_name}' not found for display.")
+    except Exception as e_read_cs:
+        result.pop("code_to_display_name", None)
+        result["code_display_message"] = f"Could not read associated .cs file '{base_cs_name}': {e_read_cs}"
+
+
+def _spill(result: dict, spill: bool | None) -> dict:
+    # Large code/output fields become blob:// handles when spilling is on for this call
+    # (or by default via CODING_MASTER_SPILL_LARGE_FIELDS=1).
+    from blob_store import SPILL_BY_DEFAULT, spill_large_fields
+
+    if spill is None:
+        spill = SPILL_BY_DEFAULT
+    if not spill:
+        return result
+    try:
+        return spill_large_fields(result, get_blob_store())
+    except OSError as e:
+        print(f"Could not spill large fields to the blob store, returning them inline: {e}")
+        return result
+
+
+def _store_full_profile(result: dict) -> dict:
+    # The full profile can be long; keep only the summary inline and serve the rest as a blob.
+    full_profile = result.get("profile", {}).get("full_profile")
+    if full_profile is None:
+        return result
+    try:
+        blob = get_blob_store().handle(full_profile)
+        result["profile"] = {**result["profile"], "full_profile": {"uri": blob["uri"], "size": blob["size"]}}
+    except OSError as e:
+        print(f"Could not store the full profile, returning it inline: {e}")
+    return result
+
+
+async def _run_resolved(code_path: str, on_output=None, limits=None, cache_ttl=None, profile=False, profile_top_n=None) -> dict:
+    # The 'code' field in the result from execute_code will be the content of the file
+    # found by get_code_path (e.g., the .csproj XML, or the .py source).
+    # For .csproj runs the associated .cs source is attached for display as well.
+    from execution_engine import engine
+
+    try:
+        # Runs on an asyncio subprocess once a worker slot is free, so slow builds
+        # don't block other clients.
+        result = await engine.run(code_path, on_output=on_output, limits=limits, cache_ttl=cache_ttl,
+                                  profile=profile, profile_top_n=profile_top_n)
+        await _attach_cs_display(result, code_path)
+        return _store_full_profile(result)
+    except Exception as e: # Catch any other unexpected errors from execute_code if it didn't return a dict
+        print(f"Critical error during execute_code call for '{code_path}': {e}")
+        return {
+            "code": f"Failed to process {code_path}", 
+            "output": f"Execution failed critically: {str(e)}", 
+            "code_file_name": os.path.basename(code_path), 
+            "return_code": -1
+        }
+
+
 @mcp.tool()
-def run_code(code_name: str) -> dict:
+@instrument_tool
+async def run_code(code_name: str, ctx: Context, stream: bool = False, timeout: float | None = None, spill: bool | None = None, cache_ttl: float | None = None, profile: bool = False, profile_top_n: int = 10) -> dict:
     """
     Execute a code file (e.g., Python script, C# project) and return its output.
     For C#, provide the project name (e.g., "EmployeeDirectory" which should resolve to "EmployeeDirectory.csproj").
     
     Args:
         code_name: The name of the code/project (without extension).
+        stream: Forward stdout/stderr to the client as log and progress notifications while the
+            program runs; the returned output then keeps only the head and tail of long streams.
+        timeout: Wall-clock limit in seconds for the program (defaults to CODING_MASTER_TIMEOUT, 30s).
+        spill: Store fields over CODING_MASTER_SPILL_BYTES (64 KiB) in the blob store and return
+            a preview plus "blobs": {field: {"uri", "size", "preview"}} instead of the full text.
+            Page through them with read_blob. Defaults to CODING_MASTER_SPILL_LARGE_FIELDS.
+        cache_ttl: For deterministic programs: reuse this result for identical runs for this many
+            seconds. A program can opt in itself with a `coding-master: cache-ttl=<seconds>` comment.
+            A run is identical when the target and its inputs are unchanged: project sources, local
+            headers, sibling .java files, and the .py modules in a script's own directory (packages
+            in subdirectories and data files the program reads are not tracked).
+        profile: Profile the program: Python runs under cProfile, C/C++ is built with -pg and
+            summarized with gprof (plus `perf stat` counters when perf is installed). The result gets
+            "profile" with the top functions by self and cumulative time, and "full_profile" as a
+            blob:// resource.
+        profile_top_n: Number of functions in each ranking of the profile summary.
+        Concurrent identical requests share one build and run ("shared_run": True).
     
     Returns:
-        A dictionary containing the code content, output, and file name.
+        A dictionary containing the code content, output, file name, queue wait time, and
+        resource usage (timed_out, limit_exceeded, peak_rss_kb, cpu_time_s).
     """
+    from utils import get_code_path
+    from sandbox import DEFAULT_LIMITS
+
     try:
-        # get_code_path is now updated to prefer .csproj for C#
+        # get_code_path prefers .csproj for C#
         code_path = get_code_path(CODE_STORAGE, code_name)
     except FileNotFoundError as e:
         print(f"Error in run_code (get_code_path): {e}")
-        # Ensure a consistent dictionary structure for errors
-        return {
-            "code": f"File for '{code_name}' not found.", 
-            "output": str(e), 
-            "code_file_name": f"{code_name} (not found)", 
-            "return_code": -1
-        }
+        return _not_found_result(code_name, e)
 
-    # The 'code' field in the result from execute_code will be the content of the file
-    # found by get_code_path (e.g., the .csproj XML, or the .py source).
-    # If you want to display the associated .cs source code instead when a .csproj is run,
-    # you would need to add logic here or in execute_code to find and read it.
-    # For now, the 'code' field will be the content of the executed project/script file.
+    on_output = None
+    if stream:
+        streamed_chars = 0
+        async def on_output(stream_name: str, chunk: str) -> None:
+            nonlocal streamed_chars
+            streamed_chars += len(chunk)
+            await ctx.info(chunk, logger_name=stream_name)
+            await ctx.report_progress(streamed_chars)
+    limits = DEFAULT_LIMITS.replace(timeout=timeout) if timeout else None
+    return _spill(await _run_resolved(code_path, on_output=on_output, limits=limits, cache_ttl=cache_ttl, profile=profile, profile_top_n=profile_top_n), spill)
+
+
+@mcp.tool()
+@instrument_tool
+async def run_codes(code_names: List[str], spill: bool | None = None) -> dict:
+    """
+    Execute several code files in parallel and return all of their results.
+    Names that resolve to the same file are built and run only once.
+    
+    Args:
+        code_names: The names of the codes/projects (without extension).
+        spill: Return large fields as blob handles, as in run_code.
+    
+    Returns:
+        A dictionary with "results" (one run_code-style dictionary per name, in order, each with
+        "code_name" and "elapsed_ms") and "total_wall_ms" for the whole batch.
+    """
+    import asyncio
+    from utils import get_code_path
+
+    batch_start = time.perf_counter()
+
+    # Resolve every name up front against the same catalog snapshot.
+    resolved = {}
+    for code_name in code_names:
+        try:
+            resolved[code_name] = get_code_path(CODE_STORAGE, code_name)
+        except FileNotFoundError as e:
+            print(f"Error in run_codes (get_code_path): {e}")
+            resolved[code_name] = e
+
+    async def timed_run(code_path: str) -> tuple:
+        start = time.perf_counter()
+        result = await _run_resolved(code_path)
+        return result, round((time.perf_counter() - start) * 1000, 3)
+
+    unique_paths = list(dict.fromkeys(path for path in resolved.values() if isinstance(path, str)))
+    runs = dict(zip(unique_paths, await asyncio.gather(*(timed_run(path) for path in unique_paths))))
+
+    results = []
+    for code_name in code_names:
+        code_path = resolved[code_name]
+        if isinstance(code_path, FileNotFoundError):
+            result, elapsed_ms = _not_found_result(code_name, code_path), 0.0
+        else:
+            result, elapsed_ms = runs[code_path]
+            result = dict(result)
+        result["code_name"] = code_name
+        result["elapsed_ms"] = elapsed_ms
+        results.append(_spill(result, spill))
+
+    return {
+        "results": results,
+        "total_wall_ms": round((time.perf_counter() - batch_start) * 1000, 3),
+    }
+
+@mcp.tool()
+@instrument_tool
+def read_blob(uri: str, offset: int = 0, length: int = 65536) -> dict:
+    """
+    Read part of a large field that run_code stored in the blob store.
+
+    Args:
+        uri: The blob's "blob://<sha256>" URI (or just the digest).
+        offset: Byte offset to start reading at.
+        length: Maximum number of bytes to return.
+
+    Returns:
+        A dictionary with the decoded "data", "offset", "length" (bytes returned), total "size"
+        and "eof". A page boundary may split a multi-byte character; it is decoded with replacement.
+    """
+    store = get_blob_store()
+    digest = uri.removeprefix("blob://")
     try:
-        result = execute_code(code_path)
-        # Optionally, if a .csproj was executed, try to load the corresponding .cs file for display
-        if result.get("code_file_name", "").endswith(".csproj"):
-            base_cs_name = os.path.splitext(result["code_file_name"])[0] + ".cs"
-            path_to_cs_display = os.path.join(os.path.dirname(code_path), base_cs_name)
-            if os.path.exists(path_to_cs_display):
-                try:
-                    with open(path_to_cs_display, "r") as f_cs:
-                        result["code_to_display_name"] = base_cs_name
-                        result["code_to_display_content"] = f_cs.read()
-                        result["code_display_message"] = (f"Executed project '{result['code_file_name']}'. "
-                                                          f"Displaying content of associated '{base_cs_name}'.")
-                except Exception as e_read_cs:
-                    result["code_display_message"] = f"Could not read associated .cs file '{base_cs_name}': {e_read_cs}"
-            else:
-                result["code_display_message"] = (f"Executed project '{result['code_file_name']}'. "
-                                                  f"Associated .cs file '{base_cs_name}' not found for display.")
+        data = store.read(digest, offset, length)
+        size = store.size(digest)
+    except (FileNotFoundError, ValueError) as e:
+        return {"error": str(e)}
+    return {
+        "data": data.decode(errors="replace"),
+        "offset": offset,
+        "length": len(data),
+        "size": size,
+        "eof": offset + len(data) >= size,
+    }
 
-        return result
-    except Exception as e: # Catch any other unexpected errors from execute_code if it didn't return a dict
-        print(f"Critical error during execute_code call for '{code_path}': {e}")
-        return {
-            "code": f"Failed to process {code_path}", 
-            "output": f"Execution failed critically: {str(e)}", 
-            "code_file_name": os.path.basename(code_path), 
-            "return_code": -1
-        }
+
+@mcp.resource(uri = "blob://{digest}", name= "Blob", description= "Full text of a large run_code field stored in the blob store.", mime_type= "text/plain")
+def get_blob(digest: str) -> str:
+    store = get_blob_store()
+    return store.read(digest, 0, store.size(digest)).decode(errors="replace")
+
+
+@mcp.resource(uri = "blob://{digest}/{offset}/{length}", name= "Blob Range", description= "length bytes of a stored run_code field starting at offset.", mime_type= "text/plain")
+def get_blob_range(digest: str, offset: int, length: int) -> str:
+    return get_blob_store().read(digest, int(offset), int(length)).decode(errors="replace")
+
+
+@mcp.resource(uri = "watcher://workspace", name= "Workspace Watcher", description= "State of the CODE_STORAGE watcher (CODING_MASTER_WATCH=1) and results of its background pre-builds.")
+def get_workspace_watcher_state() -> dict:
+    from workspace_watcher import WATCH_ENABLED
+
+    return {"enabled": WATCH_ENABLED, **get_workspace_watcher().stats()}
+
+
+@mcp.resource(uri = "startup://report", name= "Startup Report", description= "Import time per module group and milliseconds from process start to transport and catalog readiness.")
+def get_startup_report() -> dict:
+    return startup.report()
+
+
+def _warm_up() -> None:
+    # Runs in the background once the SSE endpoint accepts connections, so the deferred imports
+    # and the first catalog scan don't delay startup or the first request much.
+    if startup.wait_for_port(mcp.settings.host, mcp.settings.port):
+        startup.mark("transport_ready")
+    with startup.timed_import("execution (deferred)"):
+        # Pulls in utils, the sandbox, the worker pool and the build caches.
+        import execution_engine
+    with startup.timed_import("tool docs + caches (deferred)"):
+        import http_cache
+        import tool_docs
+        get_generation_cache()
+    from code_catalog import get_catalog
+    get_catalog(CODE_STORAGE).refresh(force=True)
+    startup.mark("catalog_ready")
+
+
+async def _serve() -> None:
+    from workspace_watcher import WATCH_ENABLED
+
+    if WATCH_ENABLED:
+        # Started on the serving loop, which is where its pre-builds run.
+        get_workspace_watcher().start()
+    try:
+        await mcp.run_async(transport='sse')
+    finally:
+        from http_cache import aclose_http_client
+        await aclose_http_client()
+
+
+startup.mark("server_imported")
 
 if __name__ == "__main__":
-    mcp.run(transport='sse')
\ No newline at end of file
+    print("Default workspace directory:", WORKSPACE_DIR)
+    threading.Thread(target=_warm_up, name="startup-warm-up", daemon=True).start()
+    import asyncio
+    asyncio.run(_serve())
\ No newline at end of file
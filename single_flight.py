@@ -0,0 +1,156 @@
+import os
+import re
+import time
+import json
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Tuple
+
+from build_inputs import build_inputs, sibling_inputs
+from sandbox import DEFAULT_LIMITS, ExecutionLimits
+from source_loader import source_cache
+
+DEFAULT_RESULT_CACHE_ENTRIES = int(os.environ.get("CODING_MASTER_RESULT_CACHE_ENTRIES", 128))
+
+# A program opts in to result caching with a comment such as `# coding-master: cache-ttl=30`
+# (or `// coding-master: cache-ttl=30`) in its first lines.
+CACHE_TTL_MARKER = re.compile(r"coding-master:\s*cache-ttl\s*=\s*([0-9]+(?:\.[0-9]+)?)")
+MARKER_SEARCH_CHARS = 2048
+
+# Besides the target itself, these files feed a build and so belong in the key.
+PROJECT_INPUT_EXTENSIONS = {
+    ".csproj": {".cs"},
+    ".cbuild": {".c", ".cpp", ".cc", ".c++", ".h", ".hpp", ".hh", ".inc"},
+}
+IGNORED_DIRS = {"bin", "obj", "build", "__pycache__", "node_modules"}
+
+
+def _target_inputs(code_path: str) -> list:
+    extension = os.path.splitext(code_path)[1]
+    if extension == ".py":
+        # Modules next to the script are importable from it (its directory is sys.path[0]).
+        return sibling_inputs(code_path, ".py")
+    extensions = PROJECT_INPUT_EXTENSIONS.get(extension)
+    if not extensions:
+        # Single-file builds: local headers, sibling Java classes.
+        return build_inputs(code_path)
+    inputs = []
+    for dir_path, dir_names, file_names in os.walk(os.path.dirname(os.path.abspath(code_path))):
+        dir_names[:] = sorted(name for name in dir_names if name not in IGNORED_DIRS and not name.startswith("."))
+        inputs += [os.path.join(dir_path, name) for name in sorted(file_names) if os.path.splitext(name)[1] in extensions]
+    return inputs
+
+
+def execution_key(code_path: str, content_digest: str, limits: ExecutionLimits | None, settings: dict) -> str:
+    """
+    Key identifying one execution: the resolved path, the content of the target and of the
+    files that feed it (project sources, local headers, sibling .java classes or .py modules),
+    the resource limits and the language settings.
+    Walks the project directory, so call it through source_loader.run_io from the event loop.
+
+    Args:
+        code_path: Resolved path of the code file.
+        content_digest: sha256 digest of the code file's content.
+        limits: Resource limits of the run (None for the defaults).
+        settings: Language and build settings that change how the program is built or run.
+
+    Returns:
+        A hex digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(os.path.abspath(code_path).encode() + b"\0")
+    digest.update(content_digest.encode())
+    for input_path in _target_inputs(code_path):
+        try:
+            digest.update(input_path.encode() + b"\0" + source_cache.load_sync(input_path).digest.encode())
+        except OSError:
+            continue
+    digest.update(json.dumps((limits or DEFAULT_LIMITS).as_dict(), sort_keys=True).encode())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def cache_ttl_from_source(code_content: str) -> float | None:
+    """
+    Get the result cache TTL a program declares with a `coding-master: cache-ttl=<seconds>` comment.
+    """
+    match = CACHE_TTL_MARKER.search(code_content[:MARKER_SEARCH_CHARS])
+    return float(match.group(1)) if match else None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one: the first caller runs the
+    coroutine, later callers wait for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """
+        Returns:
+            (result, shared). shared is True when the result came from another caller's run.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._calls = {}
+
+        call = self._calls.get(key)
+        if call is not None:
+            self.shared += 1
+            return await asyncio.shield(call), True
+
+        call = asyncio.ensure_future(fn())
+        self._calls[key] = call
+        self.leaders += 1
+
+        def forget(done: asyncio.Future) -> None:
+            if self._calls.get(key) is done:
+                del self._calls[key]
+            if not done.cancelled():
+                done.exception()  # retrieved here in case every caller was cancelled
+
+        call.add_done_callback(forget)
+        # Shielded, so a caller that gives up doesn't cancel the run for the others.
+        return await asyncio.shield(call), False
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "runs": self.leaders, "shared": self.shared}
+
+
+class ResultCache:
+    """
+    Short-lived LRU cache of execution results for programs that opted in.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_RESULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, result)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> dict | None:
+        cached = self._entries.get(key)
+        if cached is not None:
+            if time.monotonic() < cached[0]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(cached[1])
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: dict, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,113 @@
+import os
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+# Threads doing file I/O for the event loop (stat, read, directory walks).
+DEFAULT_IO_THREADS = int(os.environ.get("CODING_MASTER_SOURCE_IO_THREADS", 8))
+# Decoded sources kept in memory across requests, validated by mtime and size on every use.
+DEFAULT_MAX_BYTES = int(os.environ.get("CODING_MASTER_SOURCE_CACHE_BYTES", 64 * 1024 * 1024))
+
+_io_pool = ThreadPoolExecutor(max_workers=DEFAULT_IO_THREADS, thread_name_prefix="source-io")
+
+
+async def run_io(fn: Callable, *args):
+    """
+    Run a blocking filesystem function on the I/O threads instead of the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_io_pool, fn, *args)
+
+
+class SourceFile:
+    """
+    One version of a file: its raw size, mtime, sha256 digest and UTF-8 text.
+    """
+
+    __slots__ = ("path", "size", "mtime_ns", "digest", "_text", "_error")
+
+    def __init__(self, path: str, data: bytes, size: int, mtime_ns: int):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = hashlib.sha256(data).hexdigest()
+        try:
+            self._text, self._error = data.decode(), None
+        except UnicodeDecodeError as e:
+            self._text, self._error = None, e
+
+    @property
+    def text(self) -> str:
+        """
+        The decoded content; raises UnicodeDecodeError for files that aren't valid UTF-8.
+        """
+        if self._error is not None:
+            raise self._error
+        return self._text
+
+
+class SourceCache:
+    """
+    Reads source files at most once per change: a cached entry is reused as long as the
+    file's mtime and size are unchanged. Entries beyond max_bytes are dropped LRU first.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()  # path -> SourceFile
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load_sync(self, path: str) -> SourceFile:
+        """
+        Get the current version of path, reading it only if it changed. Blocks; from the event
+        loop use load() instead.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return cached
+
+        with open(path, "rb") as f:
+            # Take the mtime from the open file so it matches what is read.
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            data = f.read()
+        source = SourceFile(path, data, len(data), mtime_ns)
+        with self._lock:
+            self.misses += 1
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[path] = source
+            self._bytes += source.size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+        return source
+
+    async def load(self, path: str) -> SourceFile:
+        """
+        Get the current version of path without blocking the event loop.
+        """
+        return await run_io(self.load_sync, path)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+source_cache = SourceCache()
@@ -0,0 +1,61 @@
+import sys
+import time
+import socket
+from contextlib import contextmanager
+
+# Taken when this module is imported, which server.py does before anything else.
+STARTED_AT = time.perf_counter()
+
+_imports: dict = {}
+_phases: dict = {}
+
+
+@contextmanager
+def timed_import(label: str):
+    """
+    Record how long the imports in the with-block take and how many modules they load.
+    """
+    modules_before = len(sys.modules)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _imports[label] = {
+            "ms": round((time.perf_counter() - start) * 1000, 3),
+            "modules_loaded": len(sys.modules) - modules_before,
+        }
+
+
+def mark(phase: str) -> None:
+    """
+    Record that phase was reached, in milliseconds since startup. Only the first mark counts.
+    """
+    _phases.setdefault(phase, round((time.perf_counter() - STARTED_AT) * 1000, 3))
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10.0) -> bool:
+    """
+    Wait until something accepts TCP connections on host:port.
+
+    Returns:
+        True once the port is open, False if timeout seconds pass first.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.1):
+                return True
+        except OSError:
+            time.sleep(0.01)
+    return False
+
+
+def report() -> dict:
+    """
+    Import time per group of server imports (slowest first) and the time to each startup phase.
+    """
+    return {
+        "imports": dict(sorted(_imports.items(), key=lambda item: item[1]["ms"], reverse=True)),
+        "phases_ms": dict(sorted(_phases.items(), key=lambda item: item[1])),
+        "modules_loaded_total": len(sys.modules),
+    }
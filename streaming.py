@@ -0,0 +1,39 @@
+import os
+from typing import Awaitable, Callable
+
+# Bytes kept from the start and from the end of each stream for the final result.
+DEFAULT_BUFFER_BYTES = int(os.environ.get("CODING_MASTER_STREAM_BUFFER_BYTES", 64 * 1024))
+CHUNK_SIZE = 4096
+
+OutputCallback = Callable[[str, str], Awaitable[None]]
+
+
+class HeadTailBuffer:
+    """
+    Keeps the first and last `limit` characters written to it and counts what was dropped
+    in between, so chatty programs don't hold their whole output in memory.
+    """
+
+    def __init__(self, limit: int = DEFAULT_BUFFER_BYTES):
+        self.limit = limit
+        self.head = ""
+        self.tail = ""
+        self.omitted = 0
+
+    def write(self, text: str) -> None:
+        if len(self.head) < self.limit:
+            take = self.limit - len(self.head)
+            self.head += text[:take]
+            text = text[take:]
+        if not text:
+            return
+        self.tail += text
+        if len(self.tail) > self.limit:
+            overflow = len(self.tail) - self.limit
+            self.omitted += overflow
+            self.tail = self.tail[overflow:]
+
+    def getvalue(self) -> str:
+        if self.omitted:
+            return f"{self.head}\n... [{self.omitted} characters omitted] ...\n{self.tail}"
+        return self.head + self.tail
@@ -0,0 +1,158 @@
+import os
+import re
+import json
+import math
+import hashlib
+from collections import Counter
+from typing import Dict, List
+
+# Upper bound on the documentation text put into a write_me_a_mcp_tool prompt.
+DEFAULT_PROMPT_CHARS = int(os.environ.get("CODING_MASTER_TOOL_DOCS_PROMPT_CHARS", 6000))
+# Long text values are cut into sections of about this many characters.
+SECTION_CHARS = 800
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+_HEADING_RE = re.compile(r"^#{1,6}\s", re.MULTILINE)
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "for", "from", "if", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "with", "you", "your",
+}
+
+
+def _tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS and len(token) > 1]
+
+
+def _split_text(text: str) -> List[str]:
+    # Split on markdown headings first, then pack paragraphs into SECTION_CHARS-sized chunks.
+    chunks = []
+    starts = [m.start() for m in _HEADING_RE.finditer(text)]
+    blocks = [text[i:j] for i, j in zip([0] + starts, starts + [len(text)])]
+    for block in blocks:
+        current = ""
+        for paragraph in re.split(r"\n\s*\n", block):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if current and len(current) + len(paragraph) > SECTION_CHARS:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def _flatten(value, path: str, out: List[tuple]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(item, f"{path}.{key}" if path else str(key), out)
+    elif isinstance(value, list):
+        if value and all(not isinstance(item, (dict, list)) for item in value):
+            out.append((path, ", ".join(str(item) for item in value)))
+        else:
+            for index, item in enumerate(value):
+                _flatten(item, f"{path}[{index}]", out)
+    elif value is not None and str(value).strip():
+        out.append((path, str(value)))
+
+
+class ToolDocs:
+    """
+    Parsed tool documentation, split into deduplicated sections with a TF-IDF index
+    for picking the parts relevant to a tool description.
+    """
+
+    def __init__(self, document, content_hash: str):
+        self.document = document
+        self.content_hash = content_hash
+        self.sections: List[dict] = []
+
+        leaves: List[tuple] = []
+        _flatten(document, "", leaves)
+        seen = set()
+        for path, text in leaves:
+            for chunk in _split_text(text):
+                fingerprint = hashlib.sha1(" ".join(chunk.lower().split()).encode()).hexdigest()
+                if fingerprint in seen:
+                    continue
+                seen.add(fingerprint)
+                self.sections.append({"path": path, "text": chunk, "terms": Counter(_tokenize(f"{path} {chunk}"))})
+
+        document_frequency = Counter()
+        for section in self.sections:
+            document_frequency.update(section["terms"].keys())
+        count = len(self.sections)
+        self.idf: Dict[str, float] = {term: math.log((1 + count) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        for section in self.sections:
+            weights = {term: tf * self.idf[term] for term, tf in section["terms"].items()}
+            section["weights"] = weights
+            section["norm"] = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+
+    def select(self, query: str, max_chars: int = DEFAULT_PROMPT_CHARS) -> List[dict]:
+        """
+        Pick the sections most relevant to query, within a character budget.
+
+        Args:
+            query: Free text, e.g. the tool description.
+            max_chars: Maximum total length of the selected sections' text.
+
+        Returns:
+            The selected sections in document order.
+        """
+        query_terms = Counter(_tokenize(query))
+        scored = []
+        for position, section in enumerate(self.sections):
+            score = sum(tf * self.idf.get(term, 0.0) * section["weights"].get(term, 0.0) for term, tf in query_terms.items())
+            scored.append((-score / section["norm"], position, section))
+        if any(score < 0 for score, _, _ in scored):
+            scored = [item for item in scored if item[0] < 0]
+        # Without any match this keeps document order, so the overview still gets in.
+        scored.sort(key=lambda item: (item[0], item[1]))
+
+        chosen, used = [], 0
+        for _, position, section in scored:
+            if used + len(section["text"]) > max_chars:
+                continue
+            chosen.append((position, section))
+            used += len(section["text"])
+        return [section for _, section in sorted(chosen, key=lambda item: item[0])]
+
+    def compact(self, query: str, max_chars: int = DEFAULT_PROMPT_CHARS) -> str:
+        """
+        Render the sections relevant to query as compact prompt text.
+        """
+        return "\n\n".join(f"[{section['path']}]\n{section['text']}" for section in self.select(query, max_chars))
+
+
+_cache: Dict[str, tuple] = {}  # path -> ((mtime_ns, size), ToolDocs)
+
+
+def load_tool_docs(path: str) -> ToolDocs:
+    """
+    Get the parsed tool documentation for path, reparsing only when the file changed.
+
+    The file's mtime and size are checked on every call; if they changed, the contents are
+    hashed and the document is only reparsed and reindexed when the hash differs.
+
+    Args:
+        path: Path to the tool_info.json file.
+
+    Returns:
+        The cached ToolDocs for the current file contents.
+    """
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with open(path, "rb") as file:
+        raw = file.read()
+    content_hash = hashlib.sha256(raw).hexdigest()
+    if cached is not None and cached[1].content_hash == content_hash:
+        docs = cached[1]
+    else:
+        docs = ToolDocs(json.loads(raw), content_hash)
+    _cache[path] = (signature, docs)
+    return docs
@@ -1,36 +1,59 @@
 import os
-import glob
 from typing import List
+import re
+import time
+import asyncio
+import shutil
+import tempfile
 import subprocess
+from build_cache import BuildCache
+from build_inputs import build_inputs, digest_inputs
+from code_catalog import LANGUAGE_BY_EXTENSION, CodeCatalog, get_catalog
+from metrics import metrics
+from native_project import DEFAULT_PROFILE, build_project, profile_flags
+from profiling import (
+    DEFAULT_TOP_N, GPROF_FLAGS, PROFILED_LANGUAGES, gprof_environment, parse_perf_stat,
+    perf_stat_command, python_profile_command, summarize_cprofile, summarize_gprof,
+)
+from python_pool import python_pool
+from source_loader import SourceFile, run_io, source_cache
+from sandbox import COMPILE_LIMITS, DEFAULT_LIMITS, NO_ADDRESS_SPACE_LIMIT_LANGUAGES, ExecutionLimits, run_limited
+from streaming import OutputCallback
+
+build_cache = BuildCache()
+
+# Build .csproj targets once per change of their inputs and run the built assembly directly,
+# instead of paying restore + build + host startup in `dotnet run` on every call.
+DOTNET_WARM = os.environ.get("CODING_MASTER_DOTNET_WARM", "1") != "0"
+# Debug by default, like the `dotnet run` it replaces (#if DEBUG, Debug.Assert, no optimizations);
+# set CODING_MASTER_DOTNET_CONFIGURATION=Release to opt in to optimized builds.
+DOTNET_BUILD_CONFIGURATION = os.environ.get("CODING_MASTER_DOTNET_CONFIGURATION", "Debug")
 
 def get_code_path(CODE_STORAGE: str, code_name: str) -> str:
     """
     Get the path to the code file based on the code name.
-    Tries to find .csproj for C# targets, then uses glob.
+    Looks the name up in the code catalog, preferring .csproj for C# targets,
+    then the other executable extensions in a fixed order (see EXTENSION_PREFERENCE).
     
     Args:
-        code_name: The name of the code file (without extension).
+        code_name: The name of the code file (without extension), optionally with a subdirectory prefix.
     
     Returns:
         The full path to the code file.
     """
-    # Attempt to find a .csproj file first for the given code_name
-    # This makes it the preferred target if both .cs and .csproj exist for a C# program
-    csproj_path = os.path.join(CODE_STORAGE, f"{code_name}.csproj")
-    if os.path.exists(csproj_path):
-        print(f"Prioritizing .csproj file for '{code_name}': {csproj_path}")
-        return csproj_path
+    with metrics.timer("execute_phase_seconds", phase="resolve"):
+        catalog = get_catalog(CODE_STORAGE)
+        matching_entries = catalog.candidates(code_name)
+        if not matching_entries or not os.path.exists(matching_entries[0]["path"]):
+            # The file may have been created or removed since the last refresh.
+            catalog.refresh(force=True)
+            matching_entries = catalog.candidates(code_name)
 
-    # Original glob search as a fallback or for other file types
-    search_pattern = os.path.join(CODE_STORAGE, f"{code_name}.*")
-    matching_files = glob.glob(search_pattern)
-    
-    if matching_files:
-        # You could add more sophisticated sorting here if needed,
-        # e.g., to prefer .py over other less common executables if found by glob.
-        # For now, taking the first match after the .csproj check.
-        print(f"Found matches with glob: {matching_files}, choosing: {matching_files[0]}")
-        return matching_files[0]
+    if matching_entries:
+        chosen = matching_entries[0]["path"]
+        if len(matching_entries) > 1:
+            print(f"Found matches in catalog: {[entry['path'] for entry in matching_entries]}, choosing: {chosen}")
+        return chosen
     else:
         raise FileNotFoundError(f"No file found with name '{code_name}' or associated project file in {CODE_STORAGE}")
 
@@ -45,47 +68,273 @@ def get_code(CODE_STORAGE:str, code_path: str)-> str:
     Returns:
         The content of the code file as a string.
     """
-    with open(code_path, "r") as f:
-        return f.read()
+    return source_cache.load_sync(code_path).text
 
-def get_all_code_paths(storage_dir: str) -> List[str]:
+def get_all_code_paths(storage_dir: str, recursive: bool = True) -> List[str]:
     """
-    Get the paths to all code files in the specified storage directory.
+    Get the paths to all code files in the specified storage directory and its subdirectories
+    (build output directories such as bin/ and obj/ are skipped).
     
     Args:
         storage_dir: The directory where code files are stored.
+        recursive: Include subdirectories through the shared, cached catalog. When False only
+            the directory itself is listed, and nothing is cached.
     
     Returns:
-        A list of full paths to all code files in the directory.
-    """
-    # List all files in the directory
-    code_files = [
-        os.path.join(storage_dir, file)
-        for file in os.listdir(storage_dir)
-        if os.path.isfile(os.path.join(storage_dir, file))
-    ]
-    
-    return code_files
+        A list of full paths to all code files in the directory, ordered by relative path.
+    """
+    catalog = get_catalog(storage_dir) if recursive else CodeCatalog(storage_dir, recursive=False)
+    return [entry["path"] for entry in catalog.entries()]
+
+
+async def run_process(command: List[str], cwd: str | None = None, limits: ExecutionLimits = COMPILE_LIMITS) -> subprocess.CompletedProcess:
+    """
+    Run a build command (compiler, dotnet build) under the compile limits and capture its output as text.
+
+    Args:
+        command: The command and its arguments.
+        cwd: Working directory for the process.
+        limits: Limits for the build (background pre-builds pass niced limits).
+
+    Returns:
+        A subprocess.CompletedProcess with decoded stdout and stderr.
+    """
+    return await run_limited(command, cwd=cwd, limits=limits)
+
+
+async def _build_java(code_path: str, code_content: str, compile_limits: ExecutionLimits = COMPILE_LIMITS):
+    """
+    Compile a Java source file through the build cache.
+
+    Returns:
+        (command_to_execute, build_status, error_result), as _build_native.
+    """
+    code_file_name = os.path.basename(code_path)
+    java_source_dir = os.path.dirname(os.path.abspath(code_path))
+    class_name = os.path.splitext(code_file_name)[0]
+    # javac also compiles the sibling classes the source references, so they are part of the key.
+    inputs_digest = await run_io(lambda: digest_inputs(java_source_dir, code_content.encode(), build_inputs(code_path)))
+    build_key = build_cache.make_key(inputs_digest, code_file_name, "javac", [])
+    async def compile_java(output_dir: str) -> subprocess.CompletedProcess:
+        compile_command = ["javac", "-d", output_dir, os.path.abspath(code_path)]
+        print(f"Compiling Java: {' '.join(compile_command)}")
+        return await run_process(compile_command, cwd=java_source_dir, limits=compile_limits)
+    with metrics.timer("execute_phase_seconds", phase="compile", language="java"):
+        class_dir, build_status, compile_result = await build_cache.build(build_key, compile_java)
+    if class_dir is None:
+        error_output = f"Java compilation failed (in {java_source_dir}):\n--- STDOUT ---\n{compile_result.stdout.strip()}\n--- STDERR ---\n{compile_result.stderr.strip()}"
+        return [], build_status, {"code": code_content, "output": error_output, "code_file_name": code_file_name, "return_code": compile_result.returncode, "build_cache": build_status}
+    print(f"Java build cache {build_status}: {class_dir}")
+    return ["java", "-cp", class_dir, class_name], build_status, None
+
+
+async def _build_native(code_path: str, code_content: str, compiler: str, language: str, extra_flags: List[str] | None = None, compile_limits: ExecutionLimits = COMPILE_LIMITS):
+    """
+    Compile a single C/C++ source file through the build cache.
+
+    Args:
+        code_path: Full path to the source file.
+        code_content: Content of the source file.
+        compiler: Compiler executable ("gcc" or "g++").
+        language: Language label used in log and error messages.
+        extra_flags: Additional compiler flags (e.g. -pg for profiling); they are part of the cache key.
+        compile_limits: Limits for the compiler process.
+
+    Returns:
+        (command_to_execute, build_status, error_result). error_result is the result
+        dictionary to return when compilation failed, otherwise None.
+    """
+    code_file_name = os.path.basename(code_path)
+    executable_name = os.path.splitext(code_file_name)[0]
+    source_dir = os.path.dirname(os.path.abspath(code_path))
+    flags = profile_flags(DEFAULT_PROFILE) + list(extra_flags or [])
+    # Local headers are part of the key, so editing one rebuilds the binary.
+    inputs_digest = await run_io(lambda: digest_inputs(source_dir, code_content.encode(), build_inputs(code_path)))
+    build_key = build_cache.make_key(inputs_digest, code_file_name, compiler, flags)
+
+    async def compile_native(output_dir: str) -> subprocess.CompletedProcess:
+        compile_command = [compiler, *flags, os.path.abspath(code_path), "-o", os.path.join(output_dir, executable_name)]
+        print(f"Compiling {language}: {' '.join(compile_command)}")
+        return await run_process(compile_command, cwd=source_dir, limits=compile_limits)
+
+    with metrics.timer("execute_phase_seconds", phase="compile", language=LANGUAGE_BY_EXTENSION[os.path.splitext(code_path)[1]]):
+        artifact_dir, build_status, compile_result = await build_cache.build(build_key, compile_native)
+    if artifact_dir is None:
+        error_output = f"{language} compilation failed:\n--- STDOUT ---\n{compile_result.stdout.strip()}\n--- STDERR ---\n{compile_result.stderr.strip()}"
+        return [], build_status, {"code": code_content, "output": error_output, "code_file_name": code_file_name, "return_code": compile_result.returncode, "build_cache": build_status}
+    print(f"{language} build cache {build_status}: {artifact_dir}")
+    return [os.path.join(artifact_dir, executable_name)], build_status, None
+
+
+def get_dotnet_project_inputs(csproj_path: str, csproj_content: str) -> List[str]:
+    """
+    Get the source files that feed a .csproj build: explicit <Compile Include> items, plus every
+    .cs file under the project directory unless EnableDefaultCompileItems is false.
+
+    Args:
+        csproj_path: Full path to the .csproj file.
+        csproj_content: Content of the .csproj file.
+
+    Returns:
+        A sorted list of full paths to the project's .cs inputs.
+    """
+    project_dir = os.path.dirname(os.path.abspath(csproj_path))
+    inputs = {
+        os.path.normpath(os.path.join(project_dir, include.replace("\\", os.sep)))
+        for include in re.findall(r'<Compile\s+Include="([^"]+)"', csproj_content)
+    }
+    if not re.search(r"<EnableDefaultCompileItems>\s*false\s*</EnableDefaultCompileItems>", csproj_content, re.IGNORECASE):
+        for root, dirs, files in os.walk(project_dir):
+            dirs[:] = [d for d in dirs if d not in ("bin", "obj")]
+            inputs.update(os.path.join(root, name) for name in files if name.endswith(".cs"))
+    return sorted(inputs)
+
+
+async def _build_dotnet(code_path: str, code_content: str, compile_limits: ExecutionLimits = COMPILE_LIMITS):
+    """
+    Build a .csproj through the build cache, keyed on the project file and its .cs inputs.
+
+    Args:
+        code_path: Full path to the .csproj file.
+        code_content: Content of the .csproj file.
+        compile_limits: Limits for the dotnet build process.
+
+    Returns:
+        (command_to_execute, build_status, build_info, error_result). build_info holds the
+        timing fields for the result dictionary; error_result is set when the build failed.
+    """
+    code_file_name = os.path.basename(code_path)
+    project_dir = os.path.dirname(os.path.abspath(code_path))
+    match = re.search(r"<AssemblyName>\s*([^<]+?)\s*</AssemblyName>", code_content)
+    assembly_name = match.group(1) if match else os.path.splitext(code_file_name)[0]
+
+    # Walks the project directory, so it runs on the I/O threads; unchanged .cs files
+    # come from the source cache without being read again.
+    inputs_digest = await run_io(lambda: digest_inputs(project_dir, code_content.encode(), get_dotnet_project_inputs(code_path, code_content)))
+    build_key = build_cache.make_key(inputs_digest, code_file_name, "dotnet", ["build", "-c", DOTNET_BUILD_CONFIGURATION])
+
+    async def compile_dotnet(output_dir: str) -> subprocess.CompletedProcess:
+        compile_command = ["dotnet", "build", os.path.abspath(code_path), "-c", DOTNET_BUILD_CONFIGURATION, "-o", output_dir, "--nologo"]
+        print(f"Building C# project: {' '.join(compile_command)}")
+        start = time.perf_counter()
+        compile_result = await run_process(compile_command, cwd=project_dir, limits=compile_limits)
+        with open(os.path.join(output_dir, ".build_ms"), "w") as f:
+            f.write(str(round((time.perf_counter() - start) * 1000, 3)))
+        return compile_result
+
+    with metrics.timer("execute_phase_seconds", phase="compile", language="csharp"):
+        output_dir, build_status, compile_result = await build_cache.build(build_key, compile_dotnet)
+    if output_dir is None:
+        error_output = f"C# build failed:\n--- STDOUT ---\n{compile_result.stdout.strip()}\n--- STDERR ---\n{compile_result.stderr.strip()}"
+        return [], build_status, {}, {"code": code_content, "output": error_output, "code_file_name": code_file_name, "return_code": compile_result.returncode, "build_cache": build_status}
+
+    build_ms = 0.0
+    try:
+        with open(os.path.join(output_dir, ".build_ms")) as f:
+            build_ms = float(f.read())
+    except (OSError, ValueError):
+        pass
+    # A warm run skips the restore + build that `dotnet run` would have repeated.
+    build_info = {"dotnet_build_ms": build_ms} if build_status == "miss" else {"time_saved_ms": build_ms}
+    print(f"C# build cache {build_status}: {output_dir}")
+    return ["dotnet", os.path.join(output_dir, assembly_name + ".dll")], build_status, build_info, None
+
+
+async def prebuild(code_path: str, compile_limits: ExecutionLimits = COMPILE_LIMITS) -> dict:
+    """
+    Build a target exactly as execute_code_async would (same cache keys and flags) without running
+    it, so that a later run finds its artifacts ready.
+
+    Args:
+        code_path: Full path to the code file (.c, .cpp, .java, .csproj or .cbuild).
+        compile_limits: Limits for the build processes.
+
+    Returns:
+        {"build_cache": "hit" | "miss" | "incremental" | None, "ok": bool}. Failed builds add
+        "output" with the compiler output; build_cache is None for targets with nothing to build.
+    """
+    source = await source_cache.load(code_path)
+    code_content = source.text
+    file_extension = os.path.splitext(code_path)[1]
+    error_result = None
+    if file_extension == ".java":
+        _, build_status, error_result = await _build_java(code_path, code_content, compile_limits)
+    elif file_extension == ".c":
+        _, build_status, error_result = await _build_native(code_path, code_content, "gcc", "C", compile_limits=compile_limits)
+    elif file_extension in [".cpp", ".c++", ".cc"]:
+        _, build_status, error_result = await _build_native(code_path, code_content, "g++", "C++", compile_limits=compile_limits)
+    elif file_extension == ".csproj" and DOTNET_WARM:
+        _, build_status, _, error_result = await _build_dotnet(code_path, code_content, compile_limits)
+    elif file_extension == ".cbuild":
+        async def run_build_process(command: List[str], cwd: str | None = None) -> subprocess.CompletedProcess:
+            return await run_process(command, cwd=cwd, limits=compile_limits)
+        project_build = await build_project(code_path, run_build_process)
+        build_status = project_build["status"]
+        if "error" in project_build:
+            error_result = {"output": "\n".join(failure.stderr.strip() for failure in project_build["error"])}
+    else:
+        return {"build_cache": None, "ok": True}
+    if error_result is not None:
+        return {"build_cache": build_status, "ok": False, "output": error_result["output"]}
+    return {"build_cache": build_status, "ok": True}
 
 
 def execute_code(code_path: str):
+    """
+    Synchronous wrapper around execute_code_async for callers outside an event loop.
+    """
+    async def run_once():
+        try:
+            return await execute_code_async(code_path)
+        finally:
+            # Pool workers can't outlive the event loop asyncio.run creates for this call.
+            await python_pool.aclose()
+    return asyncio.run(run_once())
+
+
+async def execute_code_async(
+    code_path: str,
+    on_output: OutputCallback | None = None,
+    limits: ExecutionLimits | None = None,
+    source: SourceFile | None = None,
+    profile: bool = False,
+    profile_top_n: int = DEFAULT_TOP_N,
+):
     """
     Execute the code and returns the dictionary containing output of the code, 
     content of the code file (e.g., .py, .csproj), file name, and return code.
 
     Args:
         code_path (str): Full path to the code file to execute (e.g., .py, .csproj).
+        on_output: Optional coroutine called with ("stdout" | "stderr", chunk) while the program
+            runs. When given, only a bounded head/tail of each stream is kept for "output".
+        limits: Timeout, rlimits and output cap for the program (defaults to sandbox.DEFAULT_LIMITS).
+        source: The file as already loaded by the caller through source_loader; loaded here otherwise.
+        profile: Run Python under cProfile, and build C/C++ with -pg and summarize with gprof
+            (wrapped in `perf stat` when perf is installed).
+        profile_top_n: Number of functions listed in each ranking of the profile summary.
 
     Returns:
         dictionary: {"code": content_of_code_path_file, "output": execution_output, "code_file_name": original_base_name, "return_code": int}
+        Compiled languages (C, C++, Java, warm C# projects) also report "build_cache": "hit" or "miss";
+        warm C# runs add "dotnet_build_ms" on a miss and "time_saved_ms" on a hit.
+        C/C++ projects (.cbuild manifests) report "build_cache": "hit", "incremental" or "miss",
+        plus "units_total", "units_compiled", "native_build_ms" and "build_profile".
+        Profiled runs add "profile": {"tool", "by_self_time", "by_cumulative_time", "full_profile", ...}
+        or {"error": ...} when the target can't be profiled.
+        Streamed runs report "output_truncated" when part of the output was dropped.
+        Every run reports "timed_out", "limit_exceeded" (None, "cpu" or "output"), and when
+        available "peak_rss_kb" and "cpu_time_s".
     """
-    if not os.path.exists(code_path):
-        raise FileNotFoundError(f"The file '{code_path}' does not exist.")
-    
-    # Read the content of the file being processed (e.g., the .py script, or the .csproj XML)
+    # Read the content of the file being processed (e.g., the .py script, or the .csproj XML),
+    # off the event loop and only if it changed since it was last loaded
     try:
-        with open(code_path, "r") as file:
-            code_content = file.read()
+        if source is None:
+            with metrics.timer("execute_phase_seconds", phase="read"):
+                source = await source_cache.load(code_path)
+        code_content = source.text
+    except FileNotFoundError:
+        raise FileNotFoundError(f"The file '{code_path}' does not exist.")
     except Exception as e:
         # If we can't even read the file that code_path points to.
         return {
@@ -100,36 +349,37 @@ def execute_code(code_path: str):
     
     command_to_execute: List[str] = []
     working_dir: str | None = None 
+    build_status: str | None = None
+    build_info: dict = {}
+    language = LANGUAGE_BY_EXTENSION.get(file_extension, "other")
+    profiling = profile and language in PROFILED_LANGUAGES
+    profile_dir = tempfile.mkdtemp(prefix="coding-master-profile-") if profiling else None
+    run_env = gprof_environment(os.path.join(profile_dir, "gmon")) if profiling and language != "python" else None
+    native_flags = GPROF_FLAGS if run_env is not None else None
     
-    exec_kwargs = {
-        "capture_output": True,
-        "text": True,
-        "check": False
-    }
-
     try:
         if file_extension == ".py":
             print(f"Executing Python script: {code_path}")
-            command_to_execute = ["python3", code_path]
+            command_to_execute = ["python3", os.path.abspath(code_path)]
+            if profiling:
+                command_to_execute = python_profile_command(code_path, os.path.join(profile_dir, "stats.prof"))
             working_dir = os.path.dirname(os.path.abspath(code_path))
 
         elif file_extension == ".java":
-            # (Your existing Java logic - ensure it's robust)
-            java_source_dir = os.path.dirname(os.path.abspath(code_path))
-            class_name = os.path.splitext(code_file_name)[0]
-            compile_command = ["javac", code_path]
-            print(f"Compiling Java: {' '.join(compile_command)}")
-            compile_result = subprocess.run(compile_command, capture_output=True, text=True, check=False, cwd=java_source_dir)
-            if compile_result.returncode != 0:
-                error_output = f"Java compilation failed (in {java_source_dir}):\n--- STDOUT ---\n{compile_result.stdout.strip()}\n--- STDERR ---\n{compile_result.stderr.strip()}"
-                return {"code": code_content, "output": error_output, "code_file_name": code_file_name, "return_code": compile_result.returncode}
-            command_to_execute = ["java", "-cp", java_source_dir, class_name]
-            working_dir = java_source_dir
+            command_to_execute, build_status, error_result = await _build_java(code_path, code_content)
+            if error_result is not None:
+                return error_result
+            working_dir = os.path.dirname(os.path.abspath(code_path))
 
         # === NEW C# HANDLING: TARGET .csproj FILES ===
         elif file_extension == ".csproj":
             print(f"Executing C# project: {code_path}")
-            command_to_execute = ["dotnet", "run", "--project", code_path]
+            if DOTNET_WARM:
+                command_to_execute, build_status, build_info, error_result = await _build_dotnet(code_path, code_content)
+                if error_result is not None:
+                    return error_result
+            else:
+                command_to_execute = ["dotnet", "run", "--project", code_path]
             # It's good practice to set the working directory to the project file's directory
             working_dir = os.path.dirname(os.path.abspath(code_path))
         
@@ -148,32 +398,32 @@ def execute_code(code_path: str):
             }
 
         elif file_extension == ".c":
-            # (Your existing C logic - ensure it's robust)
-            source_dir = os.path.dirname(os.path.abspath(code_path))
-            executable_name = os.path.splitext(code_file_name)[0]
-            executable_path = os.path.join(source_dir, executable_name)
-            compile_command = ["gcc", code_path, "-o", executable_path]
-            print(f"Compiling C: {' '.join(compile_command)}")
-            compile_result = subprocess.run(compile_command, capture_output=True, text=True, check=False, cwd=source_dir)
-            if compile_result.returncode != 0:
-                error_output = f"C compilation failed:\n--- STDOUT ---\n{compile_result.stdout.strip()}\n--- STDERR ---\n{compile_result.stderr.strip()}"
-                return {"code": code_content, "output": error_output, "code_file_name": code_file_name, "return_code": compile_result.returncode}
-            command_to_execute = [executable_path]
-            working_dir = source_dir
+            command_to_execute, build_status, error_result = await _build_native(code_path, code_content, "gcc", "C", native_flags)
+            if error_result is not None:
+                return error_result
+            working_dir = os.path.dirname(os.path.abspath(code_path))
 
         elif file_extension in [".cpp", ".c++", ".cc"]:
-            # (Your existing C++ logic - ensure it's robust)
-            source_dir = os.path.dirname(os.path.abspath(code_path))
-            executable_name = os.path.splitext(code_file_name)[0]
-            executable_path = os.path.join(source_dir, executable_name)
-            compile_command = ["g++", code_path, "-o", executable_path]
-            print(f"Compiling C++: {' '.join(compile_command)}")
-            compile_result = subprocess.run(compile_command, capture_output=True, text=True, check=False, cwd=source_dir)
-            if compile_result.returncode != 0:
-                error_output = f"C++ compilation failed:\n--- STDOUT ---\n{compile_result.stdout.strip()}\n--- STDERR ---\n{compile_result.stderr.strip()}"
-                return {"code": code_content, "output": error_output, "code_file_name": code_file_name, "return_code": compile_result.returncode}
-            command_to_execute = [executable_path]
-            working_dir = source_dir
+            command_to_execute, build_status, error_result = await _build_native(code_path, code_content, "g++", "C++", native_flags)
+            if error_result is not None:
+                return error_result
+            working_dir = os.path.dirname(os.path.abspath(code_path))
+
+        elif file_extension == ".cbuild":
+            print(f"Building C/C++ project: {code_path}")
+            with metrics.timer("execute_phase_seconds", phase="compile", language="native"):
+                project_build = await build_project(code_path, run_process, extra_flags=native_flags)
+            build_status = project_build.pop("status")
+            command_to_execute = [project_build.pop("executable")]
+            if "error" in project_build:
+                failures = project_build.pop("error")
+                error_output = "C/C++ project build failed:\n" + "\n".join(
+                    f"$ {' '.join(failure.args)}\n--- STDOUT ---\n{failure.stdout.strip()}\n--- STDERR ---\n{failure.stderr.strip()}"
+                    for failure in failures
+                )
+                return {"code": code_content, "output": error_output, "code_file_name": code_file_name, "return_code": project_build.pop("return_code"), "build_cache": build_status, **project_build}
+            build_info = project_build
+            working_dir = os.path.dirname(os.path.abspath(code_path))
         else:
             raise ValueError(f"Unsupported file extension for execution: {file_extension} (from file: {code_path})")
         
@@ -183,9 +433,24 @@ def execute_code(code_path: str):
         print(f"Executing command: {' '.join(command_to_execute)}")
         if working_dir:
             print(f"In working directory: {working_dir}")
-            exec_kwargs["cwd"] = working_dir
             
-        execution_result = subprocess.run(command_to_execute, **exec_kwargs)
+        if limits is None:
+            limits = DEFAULT_LIMITS
+        if LANGUAGE_BY_EXTENSION.get(file_extension) in NO_ADDRESS_SPACE_LIMIT_LANGUAGES:
+            limits = limits.replace(memory_bytes=None)
+
+        profiled_executable = command_to_execute[0]
+        perf_output = os.path.join(profile_dir, "perf-stat.csv") if run_env is not None else None
+        if perf_output is not None:
+            command_to_execute = perf_stat_command(command_to_execute, perf_output) or command_to_execute
+
+        with metrics.timer("execute_phase_seconds", phase="execute", language=language):
+            if file_extension == ".py" and python_pool.enabled and on_output is None and not profiling:
+                # Pre-warmed interpreter: skips python3 startup and common stdlib imports.
+                execution_result = await python_pool.run(code_path, limits=limits, source=code_content)
+            else:
+                execution_result = await run_limited(command_to_execute, cwd=working_dir, limits=limits, on_output=on_output, env=run_env)
+        format_start = time.perf_counter()
         
         output_log_parts = []
         if execution_result.stdout:
@@ -202,15 +467,57 @@ def execute_code(code_path: str):
             else:
                 final_output = f"(No output on stdout or stderr, execution failed with return code {execution_result.returncode})"
         
+        timed_out = getattr(execution_result, "timed_out", False)
+        limit_exceeded = getattr(execution_result, "limit_exceeded", None)
+        if timed_out:
+            final_output += f"\n(Execution timed out after {limits.timeout} seconds; the process group was killed)"
+        elif limit_exceeded == "cpu":
+            final_output += f"\n(CPU time limit of {limits.cpu_seconds} seconds exceeded)"
+        elif limit_exceeded == "output":
+            final_output += f"\n(Output limit of {limits.max_output_bytes} bytes exceeded; output was cut off)"
+
         if execution_result.returncode != 0:
             print(f"Execution of '{code_file_name}' failed with return code {execution_result.returncode}.")
         
-        return {
+        result = {
             "code": code_content, # Content of the file specified by code_path (e.g., .py, .csproj)
             "output": final_output,
             "code_file_name": code_file_name, # e.g., "EmployeeDirectory.csproj"
             "return_code": execution_result.returncode
         }
+        if build_status is not None:
+            result["build_cache"] = build_status # "hit" or "miss" for compiled languages
+        result.update(build_info)
+        if getattr(execution_result, "omitted", 0):
+            result["output_truncated"] = True
+        result["timed_out"] = timed_out
+        result["limit_exceeded"] = limit_exceeded
+        for usage_field in ("peak_rss_kb", "cpu_time_s"):
+            if getattr(execution_result, usage_field, None) is not None:
+                result[usage_field] = getattr(execution_result, usage_field)
+
+        if profile and not profiling:
+            result["profile"] = {"error": f"Profiling is supported for Python and C/C++ targets, not {language}."}
+        elif profiling and language == "python":
+            stats_path = os.path.join(profile_dir, "stats.prof")
+            if os.path.exists(stats_path):
+                result["profile"] = await run_io(summarize_cprofile, stats_path, profile_top_n)
+            else:
+                result["profile"] = {"tool": "cProfile", "error": "No profile data was written (the program did not exit normally)."}
+        elif profiling:
+            result["profile"] = await summarize_gprof(profiled_executable, os.path.join(profile_dir, "gmon"), profile_top_n)
+            if perf_output is not None and command_to_execute[0] == "perf":
+                result["profile"]["perf_stat"] = parse_perf_stat(perf_output)
+
+        metrics.observe("execute_phase_seconds", time.perf_counter() - format_start, phase="format")
+        if timed_out:
+            outcome = "timeout"
+        elif limit_exceeded:
+            outcome = f"{limit_exceeded}_limit"
+        else:
+            outcome = "ok" if execution_result.returncode == 0 else "error"
+        metrics.inc("executions_total", language=language, outcome=outcome)
+        return result
     except FileNotFoundError as e:
         error_msg = f"Command not found (e.g., dotnet, python3, gcc) or file missing during execution: {str(e)}"
         print(error_msg)
@@ -222,3 +529,6 @@ def execute_code(code_path: str):
         error_msg = f"An unexpected error occurred in execute_code for '{code_file_name}': {type(e).__name__} - {str(e)}"
         print(error_msg)
         return {"code": code_content, "output": error_msg, "code_file_name": code_file_name, "return_code": -1}
+    finally:
+        if profile_dir is not None:
+            shutil.rmtree(profile_dir, ignore_errors=True)
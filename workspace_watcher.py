@@ -0,0 +1,420 @@
+import os
+import time
+import errno
+import select
+import shutil
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+import threading
+from collections import deque
+from typing import Dict, List, Set
+
+from build_inputs import build_inputs
+from code_catalog import IGNORED_DIRS, get_catalog
+from metrics import metrics
+from sandbox import COMPILE_LIMITS
+from single_flight import PROJECT_INPUT_EXTENSIONS
+
+# Off unless CODING_MASTER_WATCH=1: watch CODE_STORAGE and pre-build targets whose sources change.
+WATCH_ENABLED = os.environ.get("CODING_MASTER_WATCH", "0") == "1"
+# "auto" uses inotify where available and falls back to polling; "inotify" or "poll" force one.
+DEFAULT_BACKEND = os.environ.get("CODING_MASTER_WATCH_BACKEND", "auto")
+# Seconds without further changes before a batch of changes is built.
+DEFAULT_DEBOUNCE = float(os.environ.get("CODING_MASTER_WATCH_DEBOUNCE", 0.5))
+DEFAULT_POLL_INTERVAL = float(os.environ.get("CODING_MASTER_WATCH_POLL_INTERVAL", 1.0))
+# Pre-builds running at the same time, and the niceness increment of their compiler processes.
+DEFAULT_JOBS = int(os.environ.get("CODING_MASTER_PREBUILD_JOBS", 1))
+DEFAULT_NICE = int(os.environ.get("CODING_MASTER_PREBUILD_NICE", 10))
+RECENT_RESULTS = 50
+# A batch is built after at most this many debounce periods, even while files keep changing.
+MAX_DEBOUNCE_PERIODS = 10
+# Longest a watcher thread blocks before checking whether it was stopped.
+WAKEUP_SECONDS = 1.0
+
+# Targets a run has to compile first, and the tool each one needs (.cbuild uses gcc and g++).
+PREBUILT_EXTENSIONS = {
+    ".c": "gcc",
+    ".cpp": "g++",
+    ".cc": "g++",
+    ".c++": "g++",
+    ".java": "javac",
+    ".csproj": "dotnet",
+    ".cbuild": "gcc",
+}
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _watched_dir(name: str) -> bool:
+    return not name.startswith(".") and name not in IGNORED_DIRS
+
+
+def _walk(root: str):
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = [name for name in dir_names if _watched_dir(name)]
+        yield dir_path, [name for name in file_names if not name.startswith(".")]
+
+
+class InotifyBackend:
+    """
+    Reports changed files under root through Linux inotify, with one watch per directory.
+    """
+
+    name = "inotify"
+
+    def __init__(self, root: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._libc = libc
+        self.root = root
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}  # watch descriptor -> directory path
+        try:
+            self._watch_tree(root)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _watch_tree(self, top: str) -> List[str]:
+        # Returns the files already in the tree, so files created along with a new directory aren't missed.
+        files = []
+        for dir_path, file_names in _walk(top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, "inotify watch limit reached (see fs.inotify.max_user_watches)")
+                continue  # removed while we were walking
+            self._dirs[wd] = dir_path
+            files += [os.path.join(dir_path, name) for name in file_names]
+        return files
+
+    def _unwatch_tree(self, top: str) -> None:
+        prefix = top + os.sep
+        for wd, dir_path in list(self._dirs.items()):
+            if dir_path == top or dir_path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def changes(self, timeout: float) -> Set[str]:
+        """
+        Wait up to timeout seconds and return the paths of files created, written, moved or deleted.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0"))
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; treat everything as changed.
+                changed.update(os.path.join(dir_path, file_name) for dir_path, file_names in _walk(self.root) for file_name in file_names)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            dir_path = self._dirs.get(wd)
+            if dir_path is None or not name or name.startswith("."):
+                continue
+            path = os.path.join(dir_path, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and _watched_dir(name):
+                    changed.update(self._watch_tree(path))
+                elif mask & IN_MOVED_FROM:
+                    self._unwatch_tree(path)
+                continue
+            changed.add(path)
+        return changed
+
+    def stats(self) -> dict:
+        return {"watched_dirs": len(self._dirs)}
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingBackend:
+    """
+    Reports changed files under root by comparing (mtime, size) snapshots every interval seconds.
+    """
+
+    name = "poll"
+
+    def __init__(self, root: str, interval: float = DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for dir_path, file_names in _walk(self.root):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self, timeout: float) -> Set[str]:
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(0.0, wait))
+        self._next_scan = time.monotonic() + self.interval
+        current = self._scan()
+        changed = {path for path in current.keys() | self._snapshot.keys() if current.get(path) != self._snapshot.get(path)}
+        self._snapshot = current
+        return changed
+
+    def stats(self) -> dict:
+        return {"watched_files": len(self._snapshot), "poll_interval_s": self.interval}
+
+    def close(self) -> None:
+        pass
+
+
+class WorkspaceWatcher:
+    """
+    Watches a storage directory and speculatively pre-builds the targets affected by each change,
+    so the next run_code of an edited program finds its build artifacts ready.
+
+    A background thread collects file events (inotify, or polling where inotify isn't available)
+    and debounces them; once the tree has been quiet for debounce seconds, the affected targets
+    (changed C/C++/Java files, and the .csproj/.cbuild projects containing changed sources) are
+    built on the server's event loop, at most jobs at a time, with niced compiler processes.
+    Pre-builds go through the same build caches as runs, so an in-progress pre-build is simply
+    awaited by a run of the same target.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        backend: str = DEFAULT_BACKEND,
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        jobs: int = DEFAULT_JOBS,
+        nice: int = DEFAULT_NICE,
+    ):
+        self.root = os.path.abspath(root)
+        self.requested_backend = backend
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.jobs = max(1, jobs)
+        self.nice = nice
+        self.compile_limits = COMPILE_LIMITS.replace(nice=nice or None)
+
+        self._backend = None
+        self._fallback_reason: str | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._tasks: Set[asyncio.Future] = set()
+
+        self._queued: Set[str] = set()
+        self._building: Set[str] = set()
+        self._rebuild: Set[str] = set()  # changed again while building
+        self.events_seen = 0
+        self.batches = 0
+        self.counts = {"total": 0, "hit": 0, "miss": 0, "incremental": 0, "failed": 0, "skipped": 0}
+        self.recent = deque(maxlen=RECENT_RESULTS)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Start watching. Call from the event loop the pre-builds should run on.
+        """
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.jobs)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._watch, name="workspace-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(WAKEUP_SECONDS * 2)
+
+    def _open_backend(self):
+        if self.requested_backend in ("auto", "inotify"):
+            try:
+                return InotifyBackend(self.root)
+            except OSError as e:
+                if self.requested_backend == "inotify":
+                    raise
+                self._fallback_reason = str(e)
+                print(f"Workspace watcher: inotify unavailable ({e}), polling every {self.poll_interval}s instead")
+        return PollingBackend(self.root, self.poll_interval)
+
+    def _watch(self) -> None:
+        try:
+            # Opened here: watching or snapshotting a large tree shouldn't hold up the event loop.
+            self._backend = self._open_backend()
+        except OSError as e:
+            print(f"Workspace watcher could not start: {e}")
+            self._fallback_reason = str(e)
+            return
+        print(f"Watching {self.root} for changes ({self._backend.name})")
+
+        pending: Set[str] = set()
+        first_change = last_change = 0.0
+        try:
+            while not self._stopping.is_set():
+                timeout = WAKEUP_SECONDS
+                if pending:
+                    flush_at = min(last_change + self.debounce, first_change + self.debounce * MAX_DEBOUNCE_PERIODS)
+                    timeout = min(timeout, max(0.0, flush_at - time.monotonic()))
+                changed = self._backend.changes(timeout)
+                now = time.monotonic()
+                if changed:
+                    self.events_seen += len(changed)
+                    if not pending:
+                        first_change = now
+                    pending |= changed
+                    last_change = now
+                if pending and (now - last_change >= self.debounce or now - first_change >= self.debounce * MAX_DEBOUNCE_PERIODS):
+                    targets = self._affected_targets(pending)
+                    pending = set()
+                    self.batches += 1
+                    if targets:
+                        self._loop.call_soon_threadsafe(self._enqueue, targets)
+        except RuntimeError:
+            pass  # the event loop was closed; the server is shutting down
+        finally:
+            self._backend.close()
+
+    def _affected_targets(self, paths: Set[str]) -> List[str]:
+        """
+        Map changed files to the targets run_code would build for them: the projects they belong
+        to, themselves, and the single-file targets whose builds read them (headers, sibling classes).
+        """
+        catalog = get_catalog(self.root)
+        catalog.refresh(force=True)
+        entries = catalog.entries()
+        projects = [entry for entry in entries if entry["extension"] in PROJECT_INPUT_EXTENSIONS]
+
+        def owners(path: str) -> List[str]:
+            extension = os.path.splitext(path)[1]
+            return [
+                project["path"] for project in projects
+                if extension in PROJECT_INPUT_EXTENSIONS[project["extension"]]
+                and path.startswith(os.path.dirname(project["path"]) + os.sep)
+            ]
+
+        def runnable(path: str) -> bool:
+            # Sources of a project are only built as part of it, and a file only when its name
+            # resolves to it (a unit shadowed by a same-named .cbuild, say, never runs on its own).
+            if owners(path) or os.path.splitext(path)[1] not in PREBUILT_EXTENSIONS:
+                return False
+            candidates = catalog.candidates(os.path.splitext(os.path.relpath(path, self.root))[0])
+            return bool(candidates) and candidates[0]["path"] == path
+
+        targets = []
+        for path in sorted(paths):
+            path_owners = owners(path)
+            targets += path_owners
+            if not path_owners and os.path.exists(path) and runnable(path):
+                targets.append(path)
+        for entry in entries:
+            if entry["path"] not in paths and paths.intersection(build_inputs(entry["path"])) and runnable(entry["path"]):
+                targets.append(entry["path"])
+        return list(dict.fromkeys(targets))
+
+    def _enqueue(self, targets: List[str]) -> None:
+        # Runs on the event loop.
+        for target in targets:
+            if target in self._building:
+                self._rebuild.add(target)
+            elif target not in self._queued:
+                self._queued.add(target)
+                task = asyncio.ensure_future(self._prebuild(target))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _prebuild(self, target: str) -> None:
+        # Imported here so that importing the watcher doesn't load the execution stack.
+        from utils import prebuild
+
+        record = {"target": os.path.relpath(target, self.root)}
+        tool = PREBUILT_EXTENSIONS[os.path.splitext(target)[1]]
+        async with self._slots:
+            self._queued.discard(target)
+            if shutil.which(tool) is None:
+                record.update(status="skipped", reason=f"{tool} is not installed")
+            else:
+                self._building.add(target)
+                start = time.perf_counter()
+                try:
+                    result = await prebuild(target, self.compile_limits)
+                except Exception as e:
+                    result = {"build_cache": None, "ok": False, "output": f"{type(e).__name__}: {e}"}
+                finally:
+                    self._building.discard(target)
+                record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                record["status"] = result["build_cache"] if result["ok"] else "failed"
+                if not result["ok"]:
+                    record["output"] = result.get("output", "")[-2000:]
+        record["finished_at"] = round(time.time(), 3)
+        self.counts["total"] += 1
+        if record["status"] in self.counts:
+            self.counts[record["status"]] += 1
+        self.recent.appendleft(record)
+        metrics.inc("prebuilds_total", status=str(record["status"]))
+        print(f"Pre-built {record['target']}: {record['status']}")
+
+        if target in self._rebuild:
+            self._rebuild.discard(target)
+            self._enqueue([target])
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "root": self.root,
+            "backend": self._backend.name if self._backend is not None else None,
+            "fallback_reason": self._fallback_reason,
+            "debounce_s": self.debounce,
+            "jobs": self.jobs,
+            "nice": self.nice,
+            **(self._backend.stats() if self._backend is not None else {}),
+            "events_seen": self.events_seen,
+            "batches": self.batches,
+            "queued": sorted(os.path.relpath(target, self.root) for target in self._queued),
+            "building": sorted(os.path.relpath(target, self.root) for target in self._building),
+            "prebuilds": dict(self.counts),
+            "recent": list(self.recent),
+        }